@@ -0,0 +1,222 @@
+"""
+Benchmarks of the rate and fidelity models: scaling curves, accuracy checks and regression tracking.
+
+Every case times one model function along one scaling axis:
+
+- the number of nodes N (3 to 20),
+- the truncation k_max of Rate_Decent (10^2 to 10^5),
+- the length of the swept L_0_in array (up to 10^6).
+
+Each case records the best wall time over a few repeats and the peak memory traced by
+tracemalloc, which includes NumPy buffers. Accuracy checks compare the fast engines with
+their reference implementations, and the stable E[max] recursion with exact rational
+arithmetic. Every run is appended as one JSON line to a history file, tagged with the git
+revision. The history file defaults to CVD_BENCHMARK_HISTORY, or else to
+benchmark_history.jsonl in ~/.local/share/Centralized_VS_Decentralized (under XDG_DATA_HOME
+if that is set), whose directory is created on the first write.
+Cases that got slower than in the latest run of a different revision by more than a
+threshold factor are flagged.
+
+    python -m Unchecked.Benchmark --quick
+    python -m Unchecked.Benchmark --history bench.jsonl --threshold 1.3
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from fractions import Fraction
+
+import numpy as np
+from . import Leading_F
+from . import Leading_R
+from . import Rate_func
+from . import TwoD_Leading_F
+
+_N_AXIS = (3, 5, 10, 15, 20)
+_K_MAX_AXIS = (10**2, 10**3, 10**4, 10**5)
+_LENGTH_AXIS = (10**3, 10**4, 10**5, 10**6)
+
+
+
+def _distances(length):
+    return np.linspace(1e-3, 300, length)
+
+
+def _twod_fidelity(N, length):
+    GHZ_success_prob = np.linspace(1e-4, 0.5, length)
+    return TwoD_Leading_F.TwoD_network_fidelity(N, GHZ_success_prob, 1e-2, 0, 0.95)
+
+
+# Case name -> (function of (axis value, fixed parameters), axis name, full axis, quick axis, fixed parameters)
+CASES = {
+    "Rate_Factory[N]": (lambda N, p: Rate_func.Rate_Factory(0.98, N, 1, _distances(p["length"])),
+                        "N", _N_AXIS, (3, 10), {"length": 10**4}),
+    "Rate_Factory[length]": (lambda length, p: Rate_func.Rate_Factory(0.98, p["N"], 1, _distances(length)),
+                             "length", _LENGTH_AXIS, (10**3, 10**4), {"N": 5}),
+    "n_all[N]": (lambda N, p: Leading_R.n_all(N, np.linspace(1e-6, 1, p["length"])),
+                 "N", _N_AXIS, (3, 10), {"length": 10**4}),
+    "Rate_Decent[N]": (lambda N, p: Rate_func.Rate_Decent(0.98, 0.98, N, 1, _distances(p["length"]), p["k_max"]),
+                       "N", _N_AXIS, (3, 10), {"length": 10**3, "k_max": 1000}),
+    "Rate_Decent[k_max]": (lambda k_max, p: Rate_func.Rate_Decent(0.98, 0.98, p["N"], 1, _distances(p["length"]),
+                                                                  k_max),
+                           "k_max", _K_MAX_AXIS, (10**2, 10**3), {"N": 3, "length": 16}),
+    "Rate_Decent[length]": (lambda length, p: Rate_func.Rate_Decent(0.98, 0.98, p["N"], 1, _distances(length),
+                                                                    p["k_max"]),
+                            "length", _LENGTH_AXIS, (10**3,), {"N": 3, "k_max": 1000}),
+    "factory_fidelity[N]": (lambda N, p: Leading_F.factory_fidelity(N, _distances(p["length"]), 1e-2, 0, 0, 1),
+                            "N", _N_AXIS, (3, 10), {"length": 10**4}),
+    "factory_fidelity[length]": (lambda length, p: Leading_F.factory_fidelity(p["N"], _distances(length), 1e-2,
+                                                                              0, 0, 1),
+                                 "length", _LENGTH_AXIS, (10**3, 10**4), {"N": 5}),
+    "TwoD_network_fidelity[N]": (lambda N, p: _twod_fidelity(N, p["length"]),
+                                 "N", _N_AXIS, (3, 10), {"length": 10**4}),
+    "TwoD_network_fidelity[length]": (lambda length, p: _twod_fidelity(p["N"], length),
+                                      "length", _LENGTH_AXIS, (10**3, 10**4), {"N": 4}),
+}
+
+
+def _exact_expected_max(N, q):
+    """E[max of N geometrics] from the alternating sum in exact rational arithmetic."""
+    q = Fraction(q)
+    return float(sum(Fraction((-1) ** (j + 1) * math.comb(N, j)) / (1 - (1 - q) ** j) for j in range(1, N + 1)))
+
+
+def _relative_error(value, reference):
+    value, reference = np.asarray(value, dtype=float), np.asarray(reference, dtype=float)
+    return float(np.max(np.abs(value - reference) / np.abs(reference)))
+
+
+# Check name -> (function returning the relative error against a reference, tolerance)
+ACCURACY_CHECKS = {
+    "Rate_Decent fast vs reference": (
+        lambda: _relative_error(Rate_func.Rate_Decent(0.9, 0.9, 4, 1, _distances(5), 300),
+                                Rate_func.Rate_Decent(0.9, 0.9, 4, 1, _distances(5), 300, method="reference")),
+        1e-10),
+    "n_all vs exact alternating sum": (
+        lambda: max(_relative_error(Leading_R.n_all(N, np.array([q])), _exact_expected_max(N, q))
+                    for N in (3, 20, 60) for q in (1e-6, 0.01, 0.5)),
+        1e-10),
+    "factory_fidelity fast vs reference": (
+        lambda: _relative_error(Leading_F.factory_fidelity(7, _distances(5), 1e-2, 0.01, 0.01, 0.95),
+                                Leading_F.factory_fidelity(7, _distances(5), 1e-2, 0.01, 0.01, 0.95,
+                                                           method="reference")),
+        1e-10),
+    "TwoD_network_fidelity fast vs reference": (
+        lambda: _relative_error(TwoD_Leading_F.TwoD_network_fidelity(5, np.array([0.01, 0.3]), 1e-2, 0.01, 0.9),
+                                TwoD_Leading_F.TwoD_network_fidelity(5, np.array([0.01, 0.3]), 1e-2, 0.01, 0.9,
+                                                                     method="reference")),
+        1e-10),
+}
+
+
+def measure(func, repeat=3):
+    """Best wall time over `repeat` calls of func, and the peak traced memory of one more call (bytes)."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def run_benchmarks(cases=None, quick=False, repeat=3):
+    """Time every case along its axis and run the accuracy checks.
+
+    Returns a dict with a list of `timings` (case, axis, value, seconds, peak_bytes) and
+    the `accuracy` checks (name, relative error, tolerance, passed).
+    """
+    timings = []
+    for name in cases or CASES:
+        func, axis, full_axis, quick_axis, fixed = CASES[name]
+        for value in (quick_axis if quick else full_axis):
+            seconds, peak = measure(lambda: func(value, fixed), repeat)
+            timings.append({"case": name, "axis": axis, "value": value, "seconds": seconds, "peak_bytes": peak})
+            print(f"{name:32s} {f'{axis}={value}':16s} {seconds * 1e3:10.2f} ms {peak / 2**20:9.1f} MiB", flush=True)
+    accuracy = []
+    for name, (check, tolerance) in ACCURACY_CHECKS.items():
+        error = check()
+        accuracy.append({"check": name, "relative_error": error, "tolerance": tolerance,
+                         "passed": bool(error <= tolerance)})
+        print(f"{name:45s} rel. error {error:.2e} {'ok' if error <= tolerance else 'FAILED'}")
+    return {"timings": timings, "accuracy": accuracy}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def default_history_path():
+    """History file used without --history, outside the package directory (see the module docstring)."""
+    if os.environ.get("CVD_BENCHMARK_HISTORY"):
+        return os.environ["CVD_BENCHMARK_HISTORY"]
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(data_home, "Centralized_VS_Decentralized", "benchmark_history.jsonl")
+
+
+def load_history(path):
+    """All runs stored in a history file, oldest first."""
+    try:
+        with open(path) as history_file:
+            return [json.loads(line) for line in history_file if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def find_regressions(run, history, threshold=1.25):
+    """Cases of run that are more than `threshold` times slower than in the latest run of another revision."""
+    previous = next((entry for entry in reversed(history) if entry["revision"] != run["revision"]), None)
+    if previous is None:
+        return []
+    baseline = {(t["case"], t["value"]): t["seconds"] for t in previous["timings"]}
+    regressions = []
+    for timing in run["timings"]:
+        before = baseline.get((timing["case"], timing["value"]))
+        if before and timing["seconds"] > threshold * before:
+            regressions.append({**timing, "baseline_seconds": before, "baseline_revision": previous["revision"],
+                                "slowdown": timing["seconds"] / before})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="run short scaling axes only")
+    parser.add_argument("--cases", nargs="*", choices=sorted(CASES), help="cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed calls per point (best is kept)")
+    parser.add_argument("--history", default=default_history_path(),
+                        help="JSON-lines history file (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown factor flagged as regression")
+    args = parser.parse_args(argv)
+
+    run = {"revision": _git_revision(), "date": datetime.now(timezone.utc).isoformat(),
+           "python": platform.python_version(), "numpy": np.__version__, "quick": args.quick,
+           **run_benchmarks(args.cases, args.quick, args.repeat)}
+    regressions = find_regressions(run, load_history(args.history), args.threshold)
+    os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+    with open(args.history, "a") as history_file:
+        history_file.write(json.dumps(run) + "\n")
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['case']} {regression['axis']}={regression['value']}: "
+              f"{regression['slowdown']:.2f}x slower than {regression['baseline_revision']}")
+    failed = [check for check in run["accuracy"] if not check["passed"]]
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
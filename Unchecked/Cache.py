@@ -0,0 +1,222 @@
+"""
+Persistent memoization of the rate and fidelity curves.
+
+Plot scripts and sweeps keep recomputing identical curves, e.g. Rate_Factory
+for N = 3, 4 over the same L_0_in grid. `CurveCache.cached` wraps a model
+function so that a call with the same arguments is answered from
+
+1. an in-process LRU of recent results, then
+2. an on-disk store of .npy files, loaded memory-mapped so that large curves
+   are not copied into memory, and only then
+3. by calling the model and writing the result to both.
+
+Keys are a SHA-256 over the function name, the MODEL_VERSION of every model
+module in _MODEL_MODULES, the parameters of Links.DEFAULT_LINK_MODEL and a
+canonical encoding of the bound arguments, including the dtype, shape and raw
+data of arrays and the parameters of a LinkModel. Every model module defines
+MODEL_VERSION, and it must be bumped whenever a formula or default in that
+module changes: that invalidates every stale result. The disk store is capped
+in size; the least recently used entries are evicted first.
+
+The module-level wrappers below use a default cache in CVD_CACHE_DIR (or
+~/.cache/Centralized_VS_Decentralized), created on the first write:
+
+    from Unchecked.Cache import Rate_Factory
+    rates = Rate_Factory(0.98, 3, 1, L_0_in)  # computed once, then cached
+
+Cached arrays are read-only.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+from . import Leading_F
+from . import Links
+from . import Rate_2D_func
+from . import Rate_func
+from . import TwoD_Leading_F
+from .Instrument import count, recording
+from .Links import LinkModel
+
+_MODEL_MODULES = (Links, Rate_func, Rate_2D_func, Leading_F, TwoD_Leading_F)
+
+
+def _encode(value, digest):
+    """Feed a canonical encoding of an argument value into a hashlib digest."""
+    if isinstance(value, (np.ndarray, list, tuple)) and not isinstance(value, str):
+        array = np.ascontiguousarray(value)
+        if array.dtype == object:
+            raise TypeError("Cannot cache a call with an argument of object dtype.")
+        digest.update(f"array:{array.dtype.str}:{array.shape}:".encode())
+        digest.update(array.tobytes())
+    elif isinstance(value, (bool, np.bool_)):
+        digest.update(f"bool:{bool(value)};".encode())
+    elif isinstance(value, (int, np.integer)):
+        digest.update(f"int:{int(value)};".encode())
+    elif isinstance(value, (float, np.floating)):
+        digest.update(f"float:{float(value)!r};".encode())
+    elif isinstance(value, LinkModel):
+        digest.update(b"LinkModel:")
+        _encode(value.etha_c, digest)
+        _encode(value.L_att, digest)
+    elif isinstance(value, str) or value is None:
+        digest.update(f"{type(value).__name__}:{value};".encode())
+    else:
+        raise TypeError(f"Cannot cache a call with an argument of type {type(value).__name__}.")
+
+
+class CurveCache:
+    """In-process LRU plus size-capped on-disk store of model results.
+
+    Parameters
+    ----------
+    directory : str or None
+        Where the .npy files are stored, created when the first result is written.
+        None keeps results in memory only.
+    max_bytes : int
+        Size cap of the on-disk store.
+    max_entries : int
+        Number of results kept in the in-process LRU.
+
+    """
+
+    def __init__(self, directory=None, max_bytes=2 ** 30, max_entries=128):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def key(self, func, *args, **kwargs):
+        """Canonical hash of a call of func, including the model versions."""
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        digest = hashlib.sha256()
+        digest.update(f"{func.__module__}.{func.__qualname__};".encode())
+        for module in _MODEL_MODULES:
+            digest.update(f"{module.__name__}={module.MODEL_VERSION};".encode())
+        # link_model=None stands for the default model, whatever its parameters are now
+        _encode(Links.DEFAULT_LINK_MODEL, digest)
+        for name, value in bound.arguments.items():
+            digest.update(f"{name}=".encode())
+            _encode(value, digest)
+        return digest.hexdigest()
+
+    def cached(self, func):
+        """Wrap func so that its results are memoized in this cache."""
+        name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = self.key(func, *args, **kwargs)
+            result = self._get(key)
+            if result is None:
+                self.stats["misses"] += 1
+                count("curve_cache_misses", function=name)
+                result = self._put(key, recording(func)(*args, **kwargs))
+            else:
+                count("curve_cache_hits", function=name)
+            return result
+        wrapper.cache = self
+        return wrapper
+
+    def clear(self):
+        """Drop every result, in memory and on disk."""
+        self._memory.clear()
+        for name in self._disk_files():
+            os.remove(os.path.join(self.directory, name))
+
+    def _get(self, key):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return self._memory[key]
+        if self.directory is None:
+            return None
+        meta_path = os.path.join(self.directory, key + ".json")
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+            parts = [np.load(os.path.join(self.directory, f"{key}.{index}.npy"), mmap_mode="r")
+                     for index in range(len(meta["scalar"]))]
+        except (OSError, ValueError):
+            return None
+        os.utime(meta_path)  # mark as recently used for eviction
+        self.stats["disk_hits"] += 1
+        result = self._unpack(meta, parts)
+        self._remember(key, result)
+        return result
+
+    def _put(self, key, result):
+        is_tuple = isinstance(result, tuple)
+        parts = [np.asarray(part) for part in (result if is_tuple else (result,))]
+        meta = {"tuple": is_tuple, "scalar": [np.ndim(part) == 0 for part in (result if is_tuple else (result,))]}
+        for part in parts:
+            part.flags.writeable = False
+        result = self._unpack(meta, parts)
+        self._remember(key, result)
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            for index, part in enumerate(parts):
+                path = os.path.join(self.directory, f"{key}.{index}.npy")
+                np.save(path + ".tmp.npy", part)
+                os.replace(path + ".tmp.npy", path)
+            # The metadata goes last: an entry without it is never read
+            meta_path = os.path.join(self.directory, key + ".json")
+            with open(meta_path + ".tmp", "w") as meta_file:
+                json.dump(meta, meta_file)
+            os.replace(meta_path + ".tmp", meta_path)
+            self._evict()
+        return result
+
+    @staticmethod
+    def _unpack(meta, parts):
+        values = [part.item() if scalar else part for part, scalar in zip(parts, meta["scalar"])]
+        return tuple(values) if meta["tuple"] else values[0]
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_files(self):
+        if self.directory is None or not os.path.isdir(self.directory):
+            return []
+        return [name for name in os.listdir(self.directory) if name.endswith((".npy", ".json"))]
+
+    def _evict(self):
+        """Delete least recently used entries until the disk store fits in max_bytes."""
+        entries = {}
+        for name in self._disk_files():
+            key = name.split(".", 1)[0]
+            path = os.path.join(self.directory, name)
+            size, last_used = entries.get(key, (0, 0))
+            stat = os.stat(path)
+            last_used = max(last_used, stat.st_mtime) if name.endswith(".json") else last_used
+            entries[key] = (size + stat.st_size, last_used)
+        total = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for name in self._disk_files():
+                if name.split(".", 1)[0] == key:
+                    os.remove(os.path.join(self.directory, name))
+            total -= size
+
+
+default_cache = CurveCache(os.environ.get("CVD_CACHE_DIR",
+                                          os.path.join(os.path.expanduser("~"), ".cache",
+                                                       "Centralized_VS_Decentralized")))
+
+Rate_Factory = default_cache.cached(Rate_func.Rate_Factory)
+Rate_Decent = default_cache.cached(Rate_func.Rate_Decent)
+Rate_Decent_adaptive = default_cache.cached(Rate_func.Rate_Decent_adaptive)
+Rate_2D = default_cache.cached(Rate_2D_func.Rate_2D)
+Rate_2D_adaptive = default_cache.cached(Rate_2D_func.Rate_2D_adaptive)
+factory_fidelity = default_cache.cached(Leading_F.factory_fidelity)
+TwoD_network_fidelity = default_cache.cached(TwoD_Leading_F.TwoD_network_fidelity)
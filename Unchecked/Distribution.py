@@ -0,0 +1,221 @@
+"""
+Completion-time distribution of the GHZ distribution protocols, beyond the mean.
+
+The rate functions build the CDF of one protocol round and reduce it to E[T]. Here the same
+table is kept in a `CompletionTimeDistribution`, which answers mean, variance, quantiles and
+P(T > t) from it without rebuilding anything:
+
+    dist = completion_time_distribution("Decentralized", 0.98, 4, np.array([10.0, 50.0]))
+    dist.mean(), dist.std(), dist.quantile(0.99), dist.sf(1000)
+
+A round is what is repeated until the final operation succeeds with probability p:
+
+- "Centralized": the max over the N links to the switch, p = q_BSM^N (as in Rate_Factory);
+- "Decentralized": the max over the N branches n_i = n_BSM * n_dist, p = q_Fuse^N (Rate_Decent);
+- "2D": the top level of F_T_max_table, p = q_BSM^(N(N-1)/2) (Rate_2D).
+
+T is the sum of a geometric number of independent rounds. Its mean and variance follow from
+the round moments (Wald's identities). Its distribution solves the renewal equation
+P(T = k) = p P(X = k) + (1 - p) sum_j P(X = j) P(T = k - j), i.e. in generating functions
+T(z) = p X(z) / (1 - (1 - p) X(z)). The power series is inverted by Newton's iteration with
+FFT products, in O(K log K) per sweep point for K time slots, and only when a quantile or
+sf asks for it, only as far as needed. FFT rounding leaves absolute errors of a few eps per
+time slot in P(T = k).
+
+k = 0 convention: all statistics here are exact, with E[X] = sum_{k>=0} P(X > k). Rate_Factory
+agrees, but Rate_Decent and Rate_2D sum P(X > k) from k = 1 and thus return p / (E[T] - delta_t / p)
+instead of 1 / E[T]; `model_mean` gives the mean in their convention.
+"""
+import numpy as np
+from .Links import resolve
+from .Rate_2D_func import _extend_level_tables, link_gen_prob
+from .Rate_func import _CHUNK_ELEMENTS, _extend_decent_link_cdf
+
+# Largest number of time slots the renewal equation of T is extended to
+_TOTAL_LIMIT = 2 ** 20
+
+
+def _series_product(a, b, n):
+    """First n coefficients (along axis 0) of the product of the power series a and b, by FFT."""
+    a, b = a[:n], b[:n]
+    size = 1 << (a.shape[0] + b.shape[0] - 2).bit_length()  # at least len(a) + len(b) - 1
+    product = np.fft.irfft(np.fft.rfft(a, size, axis=0) * np.fft.rfft(b, size, axis=0), size, axis=0)
+    out = np.zeros((n,) + product.shape[1:])
+    out[:min(n, size)] = product[:n]
+    return out
+
+
+def _series_inverse(a, n):
+    """First n coefficients of 1 / a for a power series a with a[0] = 1, by Newton's iteration."""
+    b = np.ones((1,) + a.shape[1:])
+    while b.shape[0] < n:
+        size = min(2 * b.shape[0], n)
+        residual = -_series_product(a, b, size)  # 1 - a b vanishes below the current length
+        residual[0] += 1
+        b = np.concatenate([b, _series_product(b, residual, size)[b.shape[0]:]])
+    return b
+
+
+class CompletionTimeDistribution:
+    """Distribution of T, a sum of a geometric number of i.i.d. rounds X, in units of delta_t.
+
+    Parameters
+    ----------
+    round_cdf : numpy.ndarray
+        Array of shape (k_max, Q); round_cdf[k-1] = P(X <= k) for each of Q sweep points.
+    success_prob : float
+        Probability p that a round ends the protocol.
+    delta_t : float
+        Duration of a time slot.
+    shape : tuple
+        Shape of the sweep points; statistics are returned in this shape (scalars for ()).
+    model_omits_k0 : bool
+        Whether the matching rate function leaves out the k = 0 term (see `model_mean`).
+
+    """
+
+    def __init__(self, round_cdf, success_prob, delta_t=1, shape=(), model_omits_k0=False):
+        self.round_cdf = np.asarray(round_cdf, dtype=float)
+        self.success_prob = success_prob
+        self.delta_t = delta_t
+        self.shape = shape
+        self.model_omits_k0 = model_omits_k0
+        k = np.arange(self.k_max + 1)[:, None]
+        survival = 1 - np.concatenate([np.zeros((1, self.round_cdf.shape[1])), self.round_cdf])
+        self._round_mean = np.sum(survival, axis=0)                  # sum_{k>=0} P(X > k)
+        self._round_second = np.sum((2 * k + 1) * survival, axis=0)  # E[X^2]
+        self._pmf = np.diff(self.round_cdf, axis=0, prepend=0)        # P(X = k), k = 1..k_max
+        self._total_pmf = np.zeros((0, self.round_cdf.shape[1]))      # P(T = k), k = 0, 1, ...
+        self._total_cdf = np.zeros((0, self.round_cdf.shape[1]))
+
+    @property
+    def k_max(self):
+        """Number of time slots in the round table."""
+        return self.round_cdf.shape[0]
+
+    @property
+    def tail_mass(self):
+        """P(X > k_max) of a round: the probability mass beyond the table."""
+        return self._out(1 - self.round_cdf[-1])
+
+    def _out(self, values):
+        values = np.asarray(values).reshape(self.shape)
+        return values.item() if values.ndim == 0 else values
+
+    def mean(self):
+        """E[T] = E[X] / p."""
+        return self._out(self.delta_t * self._round_mean / self.success_prob)
+
+    def model_mean(self):
+        """E[T] in the convention of the matching rate function, whose rate is 1 / model_mean()."""
+        round_mean = self._round_mean - 1 if self.model_omits_k0 else self._round_mean
+        return self._out(self.delta_t * round_mean / self.success_prob)
+
+    def var(self):
+        """Var[T] = Var[X] / p + E[X]^2 (1 - p) / p^2."""
+        p = self.success_prob
+        round_var = self._round_second - self._round_mean**2
+        return self._out(self.delta_t**2 * (round_var / p + self._round_mean**2 * (1 - p) / p**2))
+
+    def std(self):
+        return self._out(np.sqrt(self.var()))
+
+    def _extend_total(self, k_needed):
+        """Solve the renewal equation of P(T = k) up to k = k_needed (at most _TOTAL_LIMIT)."""
+        k_done = self._total_pmf.shape[0]
+        if k_needed < k_done:
+            return
+        # At least double the solved range, so that growing it step by step stays O(K log K)
+        n = min(max(int(k_needed), 2 * k_done), _TOTAL_LIMIT) + 1
+        p = self.success_prob
+        round_pgf = np.concatenate([np.zeros((1, self._pmf.shape[1])), self._pmf])  # P(X = k), k = 0..k_max
+        total = np.empty((n, self._pmf.shape[1]))
+        step = max(1, _CHUNK_ELEMENTS // (2 * n))
+        for start in range(0, total.shape[1], step):
+            x = round_pgf[:, start:start + step]
+            a = -(1 - p) * x  # 1 - (1 - p) X(z)
+            a[0] = 1
+            total[:, start:start + step] = p * _series_product(x, _series_inverse(a, n), n)
+        self._total_pmf = total
+        self._total_cdf = np.cumsum(total, axis=0)
+
+    def cdf(self, t):
+        """P(T <= t) for a time t."""
+        k = int(np.floor(t / self.delta_t))
+        if k < 0:
+            return self._out(np.zeros(self._pmf.shape[1]))
+        self._extend_total(k)
+        if k >= self._total_cdf.shape[0]:
+            return self._out(np.full(self._pmf.shape[1], np.nan))
+        return self._out(self._total_cdf[k])
+
+    def sf(self, t):
+        """P(T > t) for a time t."""
+        return self._out(1 - np.asarray(self.cdf(t)))
+
+    def quantile(self, q):
+        """Smallest time t with P(T <= t) >= q (nan where that lies beyond the solved range).
+
+        The search starts from the q-quantile of a shifted exponential time with the mean
+        and standard deviation of T, and doubles from there up to the bracket of Cantelli's
+        inequality, P(T >= mean + c std) <= 1 / (1 + c^2), beyond which the quantile cannot lie.
+        """
+        mean = self._round_mean / self.success_prob
+        std = np.sqrt(np.ravel(self.var())) / self.delta_t
+        bracket = min(int(np.max(mean + np.sqrt(q / (1 - q)) * std)) + 1, _TOTAL_LIMIT)
+        k = min(max(int(np.max(mean + (np.log(1 / (1 - q)) - 1) * std)) + 1, 1), bracket)
+        self._extend_total(k)
+        while np.any(self._total_cdf[-1] < q) and self._total_cdf.shape[0] <= bracket:
+            self._extend_total(2 * self._total_cdf.shape[0])
+        reached = self._total_cdf[-1] >= q
+        index = np.argmax(self._total_cdf >= q, axis=0)
+        return self._out(np.where(reached, index * self.delta_t, np.nan))
+
+
+def completion_time_distribution(protocol, q_BSM, N, L_0_in, q_Fuse=None, m=1, t="Centralized", delta_t=1,
+                                 k_max=None, tail=1e-12, k_limit=2 ** 20, link_model=None):
+    """Completion-time distribution of a protocol at the distances L_0_in.
+
+    Parameters
+    ----------
+    protocol : str
+        One of "Centralized", "Decentralized" or "2D".
+    q_BSM, N, L_0_in, q_Fuse, m, t, delta_t, link_model
+        As in Rate_Factory, Rate_Decent and Rate_2D; q_Fuse defaults to q_BSM.
+    k_max : int or None
+        Number of time slots of the round table. None doubles it from 1024, adding only
+        the rows of the new time slots, until the round mass beyond the table is below
+        tail at every distance, or k_limit is reached.
+
+    Returns
+    -------
+    CompletionTimeDistribution
+
+    """
+    q_Fuse = q_BSM if q_Fuse is None else q_Fuse
+    shape = np.shape(L_0_in)
+    if protocol == "Centralized":
+        q_link = np.atleast_1d(resolve(link_model).q_link("factory", L_0_in, N)).ravel()
+        success_prob = q_BSM**N
+        extend = lambda state, k_lo, k_hi: (1 - (1 - q_link) ** np.arange(k_lo + 1, k_hi + 1)[:, None]) ** N
+    elif protocol == "Decentralized":
+        q_link = np.atleast_1d(resolve(link_model).q_link("decentralized", L_0_in)).ravel()
+        success_prob = q_Fuse**N
+        extend = lambda state, k_lo, k_hi: _extend_decent_link_cdf(state, q_BSM, q_link, k_lo, k_hi) ** N
+    elif protocol == "2D":
+        q_link = np.atleast_1d(link_gen_prob(t, L_0_in, m, N, link_model)).ravel()
+        success_prob = q_BSM**(N * (N - 1) / 2)
+        centralized = t.lower() == "centralized"
+        extend = lambda state, k_lo, k_hi: _extend_level_tables(state, q_link, k_lo, k_hi, m, N, q_BSM, q_Fuse,
+                                                                 centralized, k_limit)[f"T_{m}"]
+    else:
+        raise ValueError("protocol must be one of 'Centralized', 'Decentralized' or '2D'.")
+
+    state = {}
+    k_hi = 1024 if k_max is None else k_max
+    rows = [extend(state, 0, k_hi)]
+    while k_max is None and np.max(1 - rows[-1][-1]) > tail and k_hi < k_limit:
+        k_lo, k_hi = k_hi, min(2 * k_hi, k_limit)
+        rows.append(extend(state, k_lo, k_hi))
+    return CompletionTimeDistribution(np.concatenate(rows), success_prob, delta_t, shape,
+                                      model_omits_k0=protocol != "Centralized")
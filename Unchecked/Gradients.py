@@ -0,0 +1,113 @@
+"""
+Analytic sensitivities of the rates and the fidelity, computed together with their values.
+
+Finite differences of Rate_Decent and factory_fidelity cost two or three model calls per
+derivative and are noisy near the truncation at k_max. Here the derivatives are propagated in
+forward mode through the same recursions that compute the values:
+
+- `Rate_Factory_grad`: the positive recursion of E[max] (Rate_func._expected_max_geometric),
+  run with derivatives=True;
+- `Rate_Decent_grad`: the CDF tables of Rate_Decent with derivatives=True, i.e. the same
+  divisor sieve with d/dq_link and d/dq_BSM carried along (Rate_func._extend_decent_link_cdf);
+- `factory_fidelity_grad`: Leading_F._factory_fidelity with derivatives=True, which carries
+  d/dprob and d/dq_link along every factor of the subset DP of _g_subset_sums.
+
+d/dL_0_in follows from d/dq_link times LinkModel.q_link_slope. The values equal those of
+Rate_Factory, Rate_Decent and factory_fidelity up to rounding; the derivatives are those of the
+truncated sums that the models evaluate, so they are consistent with the values at any k_max.
+Rate_2D is not covered.
+"""
+import numpy as np
+from .Instrument import instrumented
+from .Leading_F import _factory_fidelity
+from .Links import resolve
+from .Rate_func import _CHUNK_ELEMENTS, _decent_link_cdf, _expected_max_geometric
+
+
+def _point_output(result, shape):
+    """Reshape every entry of result to the sweep shape, returning scalars for a scalar L_0_in."""
+    result = {key: np.asarray(value, dtype=float).reshape(shape) for key, value in result.items()}
+    if len(shape) == 0:
+        return {key: value.item() for key, value in result.items()}
+    return result
+
+
+@instrumented
+def Rate_Factory_grad(q_BSM, N, delta_t, L_0_in, link_model=None):
+    """
+    Rate_Factory_grad calculates Rate_Factory and its derivatives.
+
+    Parameters:
+      q_BSM, N, delta_t, L_0_in, link_model - As in Rate_Factory
+
+    Returns:
+      result - dict with `rate`, `d_L_0_in` (per km) and `d_q_BSM`, each of the shape of
+               L_0_in (scalars for a scalar L_0_in)
+    """
+    links = resolve(link_model)
+    L_0_in = np.asarray(L_0_in, dtype=float)
+    M, dM = _expected_max_geometric(N, links.q_link("factory", L_0_in, N), derivatives=True)
+    rate = q_BSM**N / (delta_t * M)
+    return _point_output({"rate": rate,
+                          "d_L_0_in": -rate * dM / M * links.q_link_slope("factory", L_0_in, N),
+                          "d_q_BSM": N * rate / q_BSM}, L_0_in.shape)
+
+
+@instrumented
+def Rate_Decent_grad(q_BSM, q_Fuse, N, delta_t, L_0_in, k_max, link_model=None):
+    """
+    Rate_Decent_grad calculates Rate_Decent and its derivatives from one set of sieve tables.
+
+    Parameters:
+      q_BSM, q_Fuse, N, delta_t, L_0_in, k_max, link_model - As in Rate_Decent
+
+    Returns:
+      result - dict with `rate`, `d_L_0_in` (per km), `d_q_BSM` and `d_q_Fuse`, each of the
+               shape of L_0_in (scalars for a scalar L_0_in)
+    """
+    links = resolve(link_model)
+    L_0_in = np.asarray(L_0_in, dtype=float)
+    q_flat = np.atleast_1d(links.q_link("decentralized", L_0_in)).ravel()
+    S, dS_dq, dS_dq_BSM = (np.zeros(q_flat.size) for _ in range(3))
+    step = max(1, _CHUNK_ELEMENTS // (3 * k_max))
+    for start in range(0, q_flat.size, step):
+        chunk = slice(start, start + step)
+        F_n_i, dF_dq, dF_dq_BSM = np.moveaxis(_decent_link_cdf(q_BSM, q_flat[chunk], k_max, derivatives=True), 1, 0)
+        # Same convention as Rate_Decent: the sum over time slots starts at k = 1
+        S[chunk] = np.sum(1 - F_n_i**N, axis=0)
+        dF_n = N * F_n_i ** (N - 1)
+        dS_dq[chunk] = -np.sum(dF_n * dF_dq, axis=0)
+        dS_dq_BSM[chunk] = -np.sum(dF_n * dF_dq_BSM, axis=0)
+
+    rate = q_Fuse**N / (delta_t * S)
+    dq_dL = np.atleast_1d(links.q_link_slope("decentralized", L_0_in)).ravel()
+    return _point_output({"rate": rate,
+                          "d_L_0_in": -rate * dS_dq / S * dq_dL,
+                          "d_q_BSM": -rate * dS_dq_BSM / S,
+                          "d_q_Fuse": N * rate / q_Fuse}, L_0_in.shape)
+
+
+@instrumented
+def factory_fidelity_grad(num_remote_nodes, L_0_in, mem_depolar_prob, link_depolar_prob, bsm_depolar_prob,
+                          ghz_fidelity, link_model=None):
+    """`factory_fidelity` and its derivatives in mem_depolar_prob and L_0_in.
+
+    Parameters
+    ----------
+    num_remote_nodes, L_0_in, mem_depolar_prob, link_depolar_prob, bsm_depolar_prob, ghz_fidelity, link_model
+        As in `factory_fidelity`.
+
+    Returns
+    -------
+    result : dict
+        `fidelity`, `d_mem_depolar_prob` and `d_L_0_in` (per km), each of the shape of
+        L_0_in (scalars for a scalar L_0_in).
+
+    """
+    links = resolve(link_model)
+    L_0_in = np.asarray(L_0_in, dtype=float)
+    fidelity, dF_dq, dF_dmem = _factory_fidelity(num_remote_nodes, links.q_link("fidelity", L_0_in), mem_depolar_prob,
+                                                 link_depolar_prob, bsm_depolar_prob, ghz_fidelity, derivatives=True)
+    return _point_output({"fidelity": fidelity,
+                          "d_mem_depolar_prob": dF_dmem,
+                          "d_L_0_in": dF_dq * links.q_link_slope("fidelity", L_0_in)}, L_0_in.shape)
@@ -0,0 +1,108 @@
+"""
+Rates of heterogeneous stars, where every end node has its own link success probability.
+
+Rate_Factory and Rate_Decent derive a single q_link from one L_0_in. Here q_link is an array
+whose last axis runs over the N nodes (or branches), and all other axes are sweep points.
+The links are still independent, so the CDF of the slowest one is the product of the
+per-node CDFs, P(max_i n_i <= k) = prod_i F_i(k). Summing its complement over k costs
+O(N * k) per sweep point, where inclusion-exclusion over distinct probabilities would
+need 2^N terms.
+
+Homogeneous inputs reproduce Rate_Factory and Rate_Decent. The fidelity models are not
+covered: the G-function of factory_fidelity assumes identical link rates.
+"""
+import numpy as np
+from .Instrument import instrumented
+from .Links import resolve
+from .Rate_func import _CHUNK_ELEMENTS, _adaptive_tail_sum, _decent_link_cdf, _truncation_error
+
+
+def link_success_prob(distances, link_model=None):
+    """q_link of links of the given lengths (in km), by default with DEFAULT_LINK_MODEL."""
+    return resolve(link_model).success_prob(np.asarray(distances, dtype=float))
+
+
+def _point_output(values, shape):
+    """Reshape per-point values to the sweep shape, returning a scalar for a single point."""
+    values = values.reshape(shape)
+    return values.item() if values.ndim == 0 else values
+
+
+@instrumented
+def Rate_Factory_hetero(q_BSM, delta_t, q_link, rtol=1e-6, k_start=1024, k_limit=2 ** 22):
+    """
+    Rate_Factory_hetero calculates the GHZ-factory rate for end nodes with
+    different link success probabilities.
+
+    E[max_i n_i] = sum_{k>=0} (1 - prod_i (1 - s_i^k)), s_i = 1 - q_i, is summed
+    until the remainder, bounded by sum_i sum_{k>K} s_i^k = sum_i s_i^(K+1) / q_i,
+    is below rtol relative to the sum. Each sweep point stops at its own K.
+    That takes about log(1 / rtol) / min_i q_i time slots, where Rate_Factory
+    needs O(N^2) operations whatever q_link: long links are much more costly
+    here. A point that reaches k_limit first is returned truncated, with a
+    Rate_err as large as the neglected remainder.
+
+    Parameters:
+      q_BSM    - Success probability of a Bell-state measurement (BSM)
+      delta_t  - Time duration of a single attempt (time step in s)
+      q_link   - Array (..., N) of the link success probabilities of the N nodes,
+                 e.g. link_success_prob(distances to the factory)
+      rtol     - Requested relative error of the rate
+      k_start  - Number of time slots in the first pass
+      k_limit  - Largest number of time slots to consider
+
+    Returns:
+      Rate_out - Average entanglement distribution rate, of shape q_link.shape[:-1]
+      Rate_err - Bound on |Rate_out minus the untruncated rate|, tail and rounding
+      k_stop   - Number of time slots at which the sum was stopped
+    """
+    q_link = np.asarray(q_link, dtype=float)
+    N = q_link.shape[-1]
+
+    def extend(state, q, k_lo, k_hi):
+        with np.errstate(divide="ignore"):
+            log_s = np.log1p(-q)  # (points, N)
+        if k_lo == 0:
+            state["S"] = np.ones(len(q))  # the k = 0 term
+        k = np.arange(k_lo + 1, k_hi + 1)[:, None, None]
+        # 1 - prod_i (1 - s_i^k), accurate also when every s_i^k is tiny
+        state["S"] += np.sum(-np.expm1(np.sum(np.log1p(-np.exp(k * log_s)), axis=-1)), axis=0)
+        return state["S"], np.sum(np.exp((k_hi + 1) * log_s) / q, axis=-1)
+
+    E_max, tail, k_stop = _adaptive_tail_sum(extend, q_link, rtol, k_start, k_limit, item_ndim=1)
+    Rate_out = q_BSM**N / (delta_t * E_max)
+    Rate_err = _truncation_error(Rate_out, E_max, tail, k_stop, N + 1)
+    shape = q_link.shape[:-1]
+    return _point_output(Rate_out, shape), _point_output(Rate_err, shape), _point_output(k_stop, shape)
+
+
+@instrumented
+def Rate_Decent_hetero(q_BSM, q_Fuse, delta_t, q_link, k_max):
+    """
+    Rate_Decent_hetero calculates the decentralized rate when every branch i
+    of the switch has its own link success probability q_i for its two links.
+
+    The CDF table F_n_i of every branch is built with the divisor sieve of
+    Rate_Decent, and the tables are multiplied across the branches.
+
+    Parameters:
+      q_BSM    - Success probability of a Bell-state measurement (BSM)
+      q_Fuse   - Success probability of a fusion operation
+      delta_t  - Time duration of a single attempt (time step in s)
+      q_link   - Array (..., N) of the link success probabilities of the N branches
+      k_max    - Maximum number of time slots to consider
+
+    Returns:
+      Rate_out - Average entanglement distribution rate, of shape q_link.shape[:-1]
+    """
+    q_link = np.asarray(q_link, dtype=float)
+    N = q_link.shape[-1]
+    q_points = q_link.reshape(-1, N)
+    E_Tmax = np.zeros(len(q_points))
+    step = max(1, _CHUNK_ELEMENTS // (k_max * N))
+    for start in range(0, len(q_points), step):
+        chunk = q_points[start:start + step]
+        F_n_i = _decent_link_cdf(q_BSM, chunk.ravel(), k_max).reshape(k_max, len(chunk), N)
+        # Same convention as Rate_Decent: the sum over time slots starts at k = 1
+        E_Tmax[start:start + step] = np.sum(1 - np.prod(F_n_i, axis=-1), axis=0) * delta_t / q_Fuse**N
+    return _point_output(1 / E_Tmax, q_link.shape[:-1])
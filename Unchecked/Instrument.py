@@ -0,0 +1,198 @@
+"""
+Opt-in instrumentation of the model functions: call counts, wall time, inner-iteration counts
+and cache hit rates.
+
+The model functions are registered with `instrumented`, which returns them unchanged: while
+instrumentation is off they are called directly and cost nothing extra. It is turned on for a
+block of code with
+
+    with profile() as session:
+        Rate_Decent(0.98, 0.98, 3, 1, L_0_in, 2000)
+    print(session.summary())
+    session.write_json("trace.json")
+
+which rebinds every reference to a registered function in the loaded modules (e.g. the
+`from .Rate_func import Rate_Decent` of other modules, or the caller's) to a recording wrapper,
+and restores the functions at the end of the block. References held elsewhere, e.g. in a
+closure, keep calling the unwrapped function; `recording(func)` looks up the one to call.
+Instrumentation is turned on for a whole process with the environment variable CVD_PROFILE, read when the package is
+imported: CVD_PROFILE=1 prints the summary to stderr at exit, and CVD_PROFILE=<path>.json
+writes the JSON there instead ("{pid}" in the path is replaced by the process id, so the
+workers of a Sweep pool write separate files).
+
+The JSON holds the per-function statistics and, with profile(trace=True) or a JSON path,
+every call as a Chrome trace event ("traceEvents"), which chrome://tracing and Perfetto display.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+ENABLED = False
+_session = None
+_registry = []  # the functions registered with `instrumented`
+_wrappers = {}  # id(function) -> (function, its recording wrapper), while enabled
+
+
+class Session:
+    """Statistics collected while instrumentation is enabled.
+
+    `stats` maps a function name to its `calls`, inclusive `seconds`, `self_seconds` (without
+    instrumented callees) and any counters recorded with `count`. With trace=True every call is
+    also kept in `events`.
+    """
+
+    def __init__(self, trace=False):
+        self.stats = {}
+        self.events = [] if trace else None
+        self._stack = []  # [name, start, child seconds] of the calls in progress
+        self._origin = time.perf_counter()
+
+    def _record(self, name):
+        if name not in self.stats:
+            self.stats[name] = {"calls": 0, "seconds": 0.0, "self_seconds": 0.0}
+        return self.stats[name]
+
+    def call(self, name, func, args, kwargs):
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - frame[1]
+            self._stack.pop()
+            record = self._record(name)
+            record["calls"] += 1
+            record["seconds"] += elapsed
+            record["self_seconds"] += elapsed - frame[2]
+            if self._stack:
+                self._stack[-1][2] += elapsed
+            if self.events is not None:
+                self.events.append({"name": name, "ph": "X", "pid": os.getpid(), "tid": 0,
+                                    "ts": (frame[1] - self._origin) * 1e6, "dur": elapsed * 1e6})
+
+    def count(self, counter, n=1, function=None):
+        if function is None:
+            function = self._stack[-1][0] if self._stack else "<top level>"
+        record = self._record(function)
+        record[counter] = record.get(counter, 0) + n
+
+    def summary(self):
+        """Table of the functions by self time, with their counters and cache hit rates."""
+        lines = [f"{'function':40s} {'calls':>9s} {'total s':>10s} {'self s':>10s}  counters"]
+        for name, record in sorted(self.stats.items(), key=lambda item: -item[1]["self_seconds"]):
+            counters = {key: value for key, value in record.items()
+                        if key not in ("calls", "seconds", "self_seconds")}
+            details = [f"{key}={value}" for key, value in counters.items()]
+            for key in counters:
+                if key.endswith("_hits"):
+                    lookups = counters[key] + counters.get(key[:-len("_hits")] + "_misses", 0)
+                    details.append(f"{key[:-len('_hits')]}_hit_rate={counters[key] / lookups:.1%}")
+            lines.append(f"{name:40s} {record['calls']:9d} {record['seconds']:10.4f} "
+                         f"{record['self_seconds']:10.4f}  {' '.join(details)}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        result = {"functions": self.stats}
+        if self.events is not None:
+            result["traceEvents"] = self.events
+        return result
+
+    def write_json(self, path):
+        with open(path.replace("{pid}", str(os.getpid())), "w") as json_file:
+            json.dump(self.to_dict(), json_file)
+
+
+def instrumented(func):
+    """Register a model function, whose calls are recorded while instrumentation is enabled."""
+    _registry.append(func)
+    if ENABLED:  # enabled from the environment: wrap for the whole process
+        return _wrap(func)
+    return func
+
+
+def _wrap(func):
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _session.call(name, func, args, kwargs)
+    return wrapper
+
+
+def recording(func):
+    """The function to call for func: its recording wrapper while instrumentation is enabled."""
+    return _wrappers.get(id(func), (func, func))[1]
+
+
+def _rebind(replacements):
+    """Replace every module attribute that is (by identity) a key of replacements by its value."""
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, "__dict__", None)
+        if not isinstance(namespace, dict):
+            continue
+        for attribute, value in list(namespace.items()):
+            old, new = replacements.get(id(value), (None, None))
+            if old is value:
+                namespace[attribute] = new
+
+
+def _install():
+    _wrappers.update((id(func), (func, _wrap(func))) for func in _registry)
+    _rebind(_wrappers)
+
+
+def _uninstall():
+    _rebind({id(wrapper): (wrapper, func) for func, wrapper in _wrappers.values()})
+    _wrappers.clear()
+
+
+def count(counter, n=1, function=None):
+    """Add n to a counter of the innermost instrumented call (or of `function`), if enabled."""
+    if ENABLED:
+        _session.count(counter, n, function)
+
+
+def lru_call(cached_func, *args):
+    """Call a functools.lru_cache function, counting whether it was a cache hit, if enabled."""
+    if not ENABLED:
+        return cached_func(*args)
+    hits = cached_func.cache_info().hits
+    result = cached_func(*args)
+    count("lru_cache_hits" if cached_func.cache_info().hits > hits else "lru_cache_misses")
+    return result
+
+
+@contextmanager
+def profile(trace=False):
+    """Enable instrumentation inside the with block, collecting into the Session it yields."""
+    global ENABLED, _session
+    previous = ENABLED, _session
+    if not ENABLED:
+        _install()
+    ENABLED, _session = True, Session(trace)
+    try:
+        yield _session
+    finally:
+        ENABLED, _session = previous
+        if not ENABLED:
+            _uninstall()
+
+
+def _enable_from_environment():
+    global ENABLED, _session
+    target = os.environ.get("CVD_PROFILE", "")
+    if target in ("", "0"):
+        return
+    ENABLED, _session = True, Session(trace=target.endswith(".json"))
+    session = _session
+    if target.endswith(".json"):
+        atexit.register(session.write_json, target)
+    else:
+        atexit.register(lambda: print(session.summary(), file=sys.stderr))
+
+
+_enable_from_environment()
@@ -0,0 +1,106 @@
+"""
+Rate and fidelity of a network design evaluated together, from one set of link probabilities.
+
+Plot_F.py and the sweeps call Rate_Factory, factory_fidelity and TwoD_network_fidelity
+separately on the same grid, each recomputing its q_link. `rate_and_fidelity` computes every
+q_link array once through the shared link model (Links.py) and feeds it to both the rate and
+the fidelity engines. For the 2D design the parent rate that the 2D fidelity needs is the
+GHZ-factory rate on the level-1 links, i.e. on the same q_link as Rate_2D.
+
+Designs:
+
+- "Centralized": Rate_Factory and factory_fidelity. Their link geometries differ (the N-gon
+  radius and sqrt(3) / 3 * L_0_in), so each gets its own q_link and nothing is shared but the
+  link model;
+- "Decentralized": Rate_Decent (there is no fidelity model, so the fidelity is nan);
+- "2D": Rate_2D with m levels and switch type t. The fidelity is the one of Plot_F.py, a 2D
+  network with GHZ-factory parents at L_0_in / 2; it is only defined for m = 1 and
+  t = "Centralized", and nan otherwise.
+
+`twod_fidelity` gives that 2D fidelity alone, without Rate_2D, for the sweeps and solvers.
+"""
+import numpy as np
+from .Instrument import instrumented
+from .Leading_F import _factory_fidelity
+from .Links import resolve
+from .Rate_2D_func import _check_type, _rate_2d
+from .Rate_func import _rate_decent, _rate_factory
+from .TwoD_Leading_F import TwoD_network_fidelity
+
+DESIGNS = ("Centralized", "Decentralized", "2D")
+
+
+def has_fidelity_model(design, m=1, t="Centralized"):
+    """Whether rate_and_fidelity gives a fidelity (and not nan) for a design."""
+    return design == "Centralized" or (design == "2D" and m == 1 and t.lower() == "centralized")
+
+
+def twod_fidelity(N, L_0_in, q_BSM=0.98, mem_depolar_prob=1e-2, link_depolar_prob=0, bsm_depolar_prob=0,
+                  ghz_fidelity=1, link_model=None):
+    """Fidelity of the 2D network built on GHZ-factory parents at L_0_in / 2, chained as in Plot_F.py.
+
+    This is the fidelity of rate_and_fidelity("2D", ...) with m = 1, without Rate_2D. The
+    parents' rate (their GHZ success probability per slot) and fidelity F_target come from
+    one joint evaluation of the Centralized design.
+    """
+    parents = rate_and_fidelity("Centralized", N, np.asarray(L_0_in, dtype=float) / 2, q_BSM=q_BSM, delta_t=1,
+                                mem_depolar_prob=mem_depolar_prob, link_depolar_prob=link_depolar_prob,
+                                bsm_depolar_prob=bsm_depolar_prob, ghz_fidelity=ghz_fidelity,
+                                link_model=link_model)
+    return TwoD_network_fidelity(N, parents["rate"], mem_depolar_prob, bsm_depolar_prob, parents["fidelity"])
+
+
+@instrumented
+def rate_and_fidelity(design, N, L_0_in, q_BSM=0.98, q_Fuse=None, delta_t=1, m=1, t="Centralized", k_max=2000,
+                      mem_depolar_prob=1e-2, link_depolar_prob=0, bsm_depolar_prob=0, ghz_fidelity=1,
+                      link_model=None):
+    """Rate and fidelity of a design at the distances L_0_in.
+
+    Parameters
+    ----------
+    design : str
+        One of "Centralized", "Decentralized" or "2D".
+    N, L_0_in, q_BSM, q_Fuse, delta_t, m, t, k_max
+        As in Rate_Factory, Rate_Decent and Rate_2D; q_Fuse defaults to q_BSM.
+    mem_depolar_prob, link_depolar_prob, bsm_depolar_prob, ghz_fidelity
+        As in factory_fidelity.
+    link_model : Links.LinkModel (optional)
+        Model of the elementary links, shared by the rate and the fidelity (default: DEFAULT_LINK_MODEL).
+
+    Returns
+    -------
+    result : dict
+        `rate` and `fidelity`, each of the shape of L_0_in (scalars for a scalar L_0_in).
+        The values equal those of the separate model functions up to rounding.
+
+    """
+    links = resolve(link_model)
+    q_Fuse = q_BSM if q_Fuse is None else q_Fuse
+    L_0_in = np.asarray(L_0_in, dtype=float)
+    fidelity_args = (mem_depolar_prob, link_depolar_prob, bsm_depolar_prob, ghz_fidelity)
+
+    if design == "Centralized":
+        rate = _rate_factory(q_BSM, N, delta_t, links.q_link("factory", L_0_in, N))
+        fidelity = _factory_fidelity(N, links.q_link("fidelity", L_0_in), *fidelity_args)
+    elif design == "Decentralized":
+        rate = _rate_decent(q_BSM, q_Fuse, N, delta_t, links.q_link("decentralized", L_0_in), k_max)
+        fidelity = np.full(L_0_in.shape, np.nan)
+    elif design == "2D":
+        _check_type(t)
+        centralized = t.lower() == "centralized"
+        q_link = links.q_link("factory" if centralized else "decentralized", L_0_in, N, m)
+        rate = _rate_2d(q_BSM, q_Fuse, N, delta_t, q_link, m, k_max, t)
+        if has_fidelity_model(design, m, t):
+            # The GHZ-factory parents at L_0_in / 2 use the level-1 links of Rate_2D
+            GHZ_success_prob = _rate_factory(q_BSM, N, 1, q_link)
+            F_target = _factory_fidelity(N, links.q_link("fidelity", L_0_in / 2), *fidelity_args)
+            fidelity = TwoD_network_fidelity(N, GHZ_success_prob, mem_depolar_prob, bsm_depolar_prob, F_target)
+        else:
+            fidelity = np.full(L_0_in.shape, np.nan)
+    else:
+        raise ValueError(f"design must be one of {DESIGNS}.")
+
+    rate, fidelity = (np.asarray(value, dtype=float).reshape(L_0_in.shape) for value in (rate, fidelity))
+    if L_0_in.ndim == 0:
+        return {"rate": rate.item(), "fidelity": fidelity.item()}
+    return {"rate": rate, "fidelity": fidelity}
@@ -32,8 +32,13 @@ ghz_fidelity = 1 - (2 ** num_qubits - 1) / 2 ** num_qubits * p_ghz
 """
 import itertools
 import numpy as np
+from .Instrument import count, instrumented
+from .Links import resolve
 
+MODEL_VERSION = 1
 
+
+@instrumented
 def _g_function(num_remote_nodes, link_success_prob, subset, prob):
     """Leading-order expression for the function G in Appendix D of the paper.
 
@@ -61,8 +66,59 @@ def _g_function(num_remote_nodes, link_success_prob, subset, prob):
     return value
 
 
+@instrumented
+def _g_subset_sums(num_remote_nodes, link_success_prob, prob, derivatives=False):
+    """Sum of `_g_function` over all subsets of {1, 2, ..., num_remote_nodes} of each size.
+
+    The i-th factor of G only depends on how many elements of the subset are smaller than i,
+    so the subsets can be swept position by position while only tracking that count.
+    This replaces the enumeration of 2 ** num_remote_nodes subsets by O(num_remote_nodes ** 2) array operations.
+
+    Parameters
+    ----------
+    num_remote_nodes : int
+        Number of remote nodes that attempt to share a GHZ state through the GHZ-factory protocol.
+    link_success_prob : float or numpy.ndarray
+        Probability per attempt that entanglement distribution between a remote node and the factory succeeds.
+    prob : float or numpy.ndarray
+        Number between 0 and 1, typically a depolarizing probability (1 - p_mem ** 2).
+    derivatives : bool (optional)
+        If True, the derivatives in `link_success_prob` and `prob` are carried along every factor
+        f = r / (c * prob + r), r = (num_remote_nodes + 1 - i) * link_success_prob, using
+        df/dlink_success_prob = (num_remote_nodes + 1 - i) c prob / D^2 and df/dprob = -c r / D^2, D = c prob + r.
+
+    Returns
+    -------
+    gs : numpy.ndarray
+        `gs[i]` is the sum of G over all subsets of size i, broadcast over `link_success_prob` and `prob`.
+        With `derivatives`, gs and its derivatives in `link_success_prob` and `prob` are stacked
+        along a new first axis.
+
+    """
+    link_success_prob = np.asarray(link_success_prob, dtype=float)
+    shape = np.broadcast(link_success_prob, prob).shape
+    # gs[0, c] holds the sum of G over the choices made for 1, ..., i - 1 that put c of them in the subset
+    gs = np.zeros((3 if derivatives else 1, num_remote_nodes + 1) + shape)
+    gs[0, 0] = 1
+    count("dp_steps", num_remote_nodes)
+    for i in range(1, num_remote_nodes + 1):
+        num_smaller = np.arange(i).reshape((-1,) + (1,) * len(shape))
+        rate = (num_remote_nodes + 1 - i) * link_success_prob
+        denominator = num_smaller * prob + rate
+        factor = rate / denominator
+        if derivatives:
+            d_factor_dq = (num_remote_nodes + 1 - i) * num_smaller * prob / denominator**2
+            gs[1, :i] = gs[1, :i] * factor + gs[0, :i] * d_factor_dq
+            gs[2, :i] = gs[2, :i] * factor - gs[0, :i] * num_smaller * rate / denominator**2
+        gs[0, :i] *= factor
+        # i is either left out of the subset or added to it
+        gs[:, 1:i + 1] = gs[:, 1:i + 1] + gs[:, :i]
+    return gs if derivatives else gs[0]
+
+
+@instrumented
 def factory_fidelity(num_remote_nodes, L_0_in, mem_depolar_prob, link_depolar_prob,
-                     bsm_depolar_prob, ghz_fidelity):
+                     bsm_depolar_prob, ghz_fidelity, method="fast", link_model=None):
     """Analytical results for the fidelity achieved with the GHZ-factory protocol (leading-order expression or bound).
 
     Parameter `bound` can be used to toggle between a strict lower bound on the fidelity and a leading-order expression.
@@ -89,13 +145,31 @@ def factory_fidelity(num_remote_nodes, L_0_in, mem_depolar_prob, link_depolar_pr
     bound : bool (optional)
         If True, a lower bound is calculated.
         If False, a leading-order expression is calculated.
+    method : str (optional)
+        "fast" (default) sums G over all subsets of a given size at once with `_g_subset_sums`,
+        vectorized over `L_0_in`. "reference" enumerates every subset and calls `_g_function` on each,
+        which is exponential in `num_remote_nodes`.
+    link_model : Links.LinkModel (optional)
+        Model of the elementary links, evaluated at sqrt(3) / 3 * L_0_in (default: DEFAULT_LINK_MODEL).
+
+    """
+    link_success_prob = resolve(link_model).q_link("fidelity", L_0_in)
+    return _factory_fidelity(num_remote_nodes, link_success_prob, mem_depolar_prob, link_depolar_prob,
+                             bsm_depolar_prob, ghz_fidelity, method)
+
+
+def _factory_fidelity(num_remote_nodes, link_success_prob, mem_depolar_prob, link_depolar_prob,
+                      bsm_depolar_prob, ghz_fidelity, method="fast", derivatives=False):
+    """`factory_fidelity` for a given link success probability.
 
+    With `derivatives` (fast method only), returns the fidelity and its derivatives in
+    `link_success_prob` and `mem_depolar_prob`, carried through `_g_subset_sums`.
     """
+    if method not in ("fast", "reference"):
+        raise ValueError("method must be either 'fast' or 'reference'.")
+    if derivatives and method != "fast":
+        raise ValueError("derivatives are only available with method 'fast'.")
 
-    L_o = (np.sqrt(3) / 3) * L_0_in
-    etha_c = 0.95
-    L_att = 20  # in km
-    link_success_prob = 0.5 * etha_c**2 * np.exp(-L_o / L_att)
     g_func = _g_function
 
     num_remote_nodes = int(num_remote_nodes)  # in case it's passed as a float
@@ -103,6 +177,10 @@ def factory_fidelity(num_remote_nodes, L_0_in, mem_depolar_prob, link_depolar_pr
     link_bsm_depolar = (1 - link_depolar_prob) * (1 - bsm_depolar_prob) ** 2
     prob = 2 * mem_depolar_prob - mem_depolar_prob ** 2
     set_all_integers = set(range(1, num_remote_nodes + 1))
+    if method == "fast":
+        gs_by_size = _g_subset_sums(num_remote_nodes, link_success_prob, prob, derivatives)
+        if derivatives:
+            gs_by_size = np.moveaxis(gs_by_size, 0, 1)  # subset size first, then value and derivatives
 
     fidelity = 0
     for i in range(num_remote_nodes + 1):
@@ -112,6 +190,9 @@ def factory_fidelity(num_remote_nodes, L_0_in, mem_depolar_prob, link_depolar_pr
         prefactor = (1 / 2) ** num_remote_nodes if i_even else 0
         if i == num_remote_nodes:
             prefactor += 1 / 2
+        if method == "fast":
+            fidelity += prefactor * link_bsm_depolar ** i * gs_by_size[i]
+            continue
         subsets_length_i = itertools.combinations(set_all_integers, i)
         gs = 0
         for subset in subsets_length_i:
@@ -124,6 +205,10 @@ def factory_fidelity(num_remote_nodes, L_0_in, mem_depolar_prob, link_depolar_pr
 
     fidelity *= 1 - ghz_depolarizing_prob
 
+    if derivatives:
+        fidelity, dF_dq, dF_dprob = fidelity
+        return fidelity + ghz_depolarizing_prob / 2 ** num_remote_nodes, dF_dq, dF_dprob * (2 - 2 * mem_depolar_prob)
+
     fidelity += ghz_depolarizing_prob / 2 ** num_remote_nodes
 
     return fidelity
@@ -1,6 +1,6 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import math
+from .Rate_func import _expected_max_geometric
+from .Sampling import adaptive_sample
 
 def factory_waiting_time(num_remote_nodes, link_success_prob, bsm_success_prob):
     """Leading-order expression of the average waiting time to deliver a single GHZ state with the GHZ-factory protocol.
@@ -29,26 +29,36 @@ def factory_waiting_time(num_remote_nodes, link_success_prob, bsm_success_prob):
 
 
 def n_all(num_remote_nodes, link_success_prob):
-    total_sum = 0
-    for j in range(1, num_remote_nodes + 1):
-        term = ((-1) ** (j + 1)) * math.comb(num_remote_nodes, j) * (1 / (1 - (1 - link_success_prob) ** j))
-        total_sum += term
-    return total_sum
-
-
-num_remote_nodes=5
-link_success_prob = np.linspace(1e-10, 1, 100000)  # Start from a small number close to 0
-bsm_success_prob = 1
-
-rates = [factory_waiting_time(num_remote_nodes, q_link, bsm_success_prob) for q_link in link_success_prob]
-
-# Plotting
-plt.figure(figsize=(8, 5))
-plt.plot(link_success_prob, rates, label="Rate vs Link Success Prob", color='b')
-plt.xlabel("Link Success Probability")
-plt.ylabel("Rate (R)")
-plt.ylim((0, 1))
-plt.title("Rate as a Function of Link Success Probability")
-plt.legend()
-plt.grid(True)
-plt.show()
\ No newline at end of file
+    """Expected number of attempts until all remote nodes share a link with the factory.
+
+    Element-wise over an array of `link_success_prob`; stays accurate for large `num_remote_nodes`
+    (see `Rate_func._expected_max_geometric`).
+    """
+    return _expected_max_geometric(int(num_remote_nodes), link_success_prob)
+
+
+def plot_rate(num_remote_nodes=5, bsm_success_prob=1, tol=1e-3):
+    """Plot the GHZ-factory rate as a function of the link success probability.
+
+    The curve is sampled with `adaptive_sample` to within tol of the plot height.
+    """
+    import matplotlib.pyplot as plt
+
+    # Start from a small number close to 0
+    link_success_prob, (rates,) = adaptive_sample(
+        lambda q: factory_waiting_time(num_remote_nodes, q, bsm_success_prob), 1e-10, 1, tol)
+
+    # Plotting
+    plt.figure(figsize=(8, 5))
+    plt.plot(link_success_prob, rates, label="Rate vs Link Success Prob", color='b')
+    plt.xlabel("Link Success Probability")
+    plt.ylabel("Rate (R)")
+    plt.ylim((0, 1))
+    plt.title("Rate as a Function of Link Success Probability")
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+
+
+if __name__ == "__main__":
+    plot_rate()
@@ -0,0 +1,81 @@
+"""
+Physical-layer model shared by the rate and fidelity functions: the success probability
+q_link of an elementary link, and the link length each network geometry implies.
+
+Every model used to hard-code etha_c = 0.95 and L_att = 20 km next to its own geometry. They
+now all evaluate
+
+    q_link = link_model.q_link(geometry, L_0_in, N, m)
+
+with a `LinkModel` holding the physical parameters (DEFAULT_LINK_MODEL unless a model
+function is given another one) and one of the GEOMETRIES, where L_0_in is the distance
+between neighboring end nodes:
+
+- "factory":       L_0_in / (2^m * 2 sin(pi / N)), the radius of the N-gon around the switch
+                   (Rate_Factory with m = 0, the centralized 2D levels with m >= 1);
+- "decentralized": L_0_in / (2^m * 2), half the neighbor distance
+                   (Rate_Decent with m = 0, the decentralized 2D levels with m >= 1);
+- "fidelity":      sqrt(3) / 3 * L_0_in, the triangle radius that factory_fidelity uses for every N.
+"""
+import numpy as np
+
+MODEL_VERSION = 1
+
+GEOMETRIES = ("factory", "decentralized", "fidelity")
+
+
+def link_length(geometry, L_0_in, N=None, m=0):
+    """Length (in km) of the elementary links of a geometry, for neighbor distance L_0_in."""
+    if geometry == "factory":
+        return L_0_in / (2**m * 2 * np.sin(np.pi / N))
+    if geometry == "decentralized":
+        return L_0_in / (2**m * 2)
+    if geometry == "fidelity":
+        return (np.sqrt(3) / 3) * L_0_in
+    raise ValueError(f"geometry must be one of {GEOMETRIES}.")
+
+
+class LinkModel:
+    """Heralded entanglement generation over fiber: q_link = 0.5 * etha_c^2 * exp(-length / L_att).
+
+    Parameters
+    ----------
+    etha_c : float
+        Coupling efficiency.
+    L_att : float
+        Attenuation length (in km).
+
+    """
+
+    def __init__(self, etha_c=0.95, L_att=20):
+        self.etha_c = etha_c
+        self.L_att = L_att
+
+    def __repr__(self):
+        return f"LinkModel(etha_c={self.etha_c!r}, L_att={self.L_att!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, LinkModel) and repr(self) == repr(other)
+
+    def __hash__(self):
+        return hash(repr(self))
+
+    def success_prob(self, length):
+        """q_link of links of the given length (in km)."""
+        return 0.5 * self.etha_c**2 * np.exp(-length / self.L_att)
+
+    def q_link(self, geometry, L_0_in, N=None, m=0):
+        """q_link of the elementary links of a geometry (see `link_length`)."""
+        return self.success_prob(link_length(geometry, L_0_in, N, m))
+
+    def q_link_slope(self, geometry, L_0_in, N=None, m=0):
+        """d(q_link)/d(L_0_in) of the elementary links of a geometry; the link length is linear in L_0_in."""
+        return -self.q_link(geometry, L_0_in, N, m) * link_length(geometry, 1, N, m) / self.L_att
+
+
+DEFAULT_LINK_MODEL = LinkModel()
+
+
+def resolve(link_model):
+    """The link model to use for a `link_model` argument (None means DEFAULT_LINK_MODEL)."""
+    return DEFAULT_LINK_MODEL if link_model is None else link_model
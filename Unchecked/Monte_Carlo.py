@@ -0,0 +1,184 @@
+"""
+Monte Carlo simulation of the GHZ distribution protocols, to validate the analytic rate models.
+
+The analytic rates in Rate_func.py and Rate_2D_func.py rest on simplifications. For example,
+a branch of the decentralized switch that needs u BSM attempts is modeled as taking u * n_dist
+time slots, with a single n_dist, while in the protocol every attempt waits for fresh links.
+Here the protocols themselves are simulated, in units of the time step delta_t, with every
+link attempt, BSM and fusion an independent Bernoulli trial:
+
+- "Centralized": N links to the central switch; once all are up, the N BSMs succeed together
+  with probability q_BSM^N, otherwise the round starts over (compare Rate_Factory).
+- "Decentralized": each of the N branches waits for its two links and retries the BSM until it
+  succeeds; once all branches are ready, the N fusions succeed together with probability
+  q_Fuse^N, otherwise everything starts over (compare Rate_Decent).
+- "2D": the m-level hierarchy of F_T_max.m, with t = "Centralized" or "Decentralized" at the
+  bottom level and a parent fusion succeeding with q_BSM^(N(N-1)/2) at every level above and
+  at the end (compare Rate_2D).
+
+Rate_Decent and Rate_2D also sum 1 - F(k) from k = 1, leaving out the k = 0 term P(T > 0) = 1
+of E[T] = sum_{k>=0} P(T > k), so for reliable BSMs their E[T] sits about one time step per
+round below the simulated mean.
+
+Samples are drawn in batches of whole protocol runs at once. The running mean and confidence
+interval of E[T] are streamed by `iter_estimates`, and `simulate_ET` compares the final
+estimate with the analytic value. A fixed seed reproduces the same runs.
+"""
+from statistics import NormalDist
+
+import numpy as np
+from .Rate_2D_func import Rate_2D_adaptive, link_gen_prob
+from .Links import resolve
+from .Rate_func import Rate_Decent_adaptive, Rate_Factory
+
+PROTOCOLS = ("Centralized", "Decentralized", "2D")
+
+
+def _repeat_until_success(rng, sampler, success_prob, size):
+    """Total time of rounds drawn by sampler, repeated until a round ends in success (prob. success_prob)."""
+    rounds = rng.geometric(success_prob, size)
+    draws = sampler(int(rounds.sum()))
+    starts = np.concatenate(([0], np.cumsum(rounds)[:-1]))
+    return np.add.reduceat(draws, starts)
+
+
+def _max_of(sampler, N, size):
+    """Max of N independent draws of sampler, for each of size samples."""
+    return sampler(size * N).reshape(size, N).max(axis=1)
+
+
+def _links(rng, q_link, count):
+    """Sampler of the time until `count` independent links are all up."""
+    return lambda size: rng.geometric(q_link, (size, count)).max(axis=1)
+
+
+def make_sampler(protocol, q_BSM, N, L_0_in, q_Fuse=None, m=1, t="Centralized", rng=None, link_model=None):
+    """Sampler of completion times T (in time steps) of a protocol at a single distance.
+
+    Parameters
+    ----------
+    protocol : str
+        One of "Centralized", "Decentralized" or "2D".
+    q_BSM : float
+        Success probability of a Bell-state measurement.
+    N : int
+        Number of qubits/nodes in the GHZ state.
+    L_0_in : float
+        Distance between neighboring end nodes (in km).
+    q_Fuse : float (optional)
+        Success probability of a fusion; defaults to q_BSM.
+    m : int (optional)
+        Number of 2D repeater levels (protocol "2D" only).
+    t : str (optional)
+        "Centralized" or "Decentralized" switch at the bottom of the 2D hierarchy.
+    rng : numpy.random.Generator (optional)
+    link_model : Links.LinkModel (optional)
+        Model of the elementary links (default: DEFAULT_LINK_MODEL).
+
+    Returns
+    -------
+    sample : callable
+        sample(size) returns an int array of size independent completion times.
+
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    q_Fuse = q_BSM if q_Fuse is None else q_Fuse
+    q_parent = q_BSM**(N * (N - 1) / 2)
+
+    def decentralized_branches(q_link):
+        # Each branch retries the BSM on freshly generated link pairs
+        branch = lambda size: _repeat_until_success(rng, _links(rng, q_link, 2), q_BSM, size)
+        return lambda size: _max_of(branch, N, size)
+
+    if protocol == "Centralized":
+        switch = _links(rng, resolve(link_model).q_link("factory", L_0_in, N), N)
+        return lambda size: _repeat_until_success(rng, switch, q_BSM**N, size)
+    if protocol == "Decentralized":
+        switch = decentralized_branches(resolve(link_model).q_link("decentralized", L_0_in))
+        return lambda size: _repeat_until_success(rng, switch, q_Fuse**N, size)
+    if protocol != "2D":
+        raise ValueError(f"protocol must be one of {PROTOCOLS}.")
+
+    q_link = link_gen_prob(t, L_0_in, m, N, link_model)
+    if t.lower() == "centralized":
+        bottom, bottom_prob = _links(rng, q_link, N), q_BSM**N
+    else:
+        bottom, bottom_prob = decentralized_branches(q_link), q_Fuse**N
+    level = lambda size, sampler=bottom, prob=bottom_prob: _max_of(
+        lambda count: _repeat_until_success(rng, sampler, prob, count), N, size)
+    for _ in range(m - 1):
+        level = lambda size, sampler=level: _max_of(
+            lambda count: _repeat_until_success(rng, sampler, q_parent, count), N, size)
+    return lambda size: _repeat_until_success(rng, level, q_parent, size)
+
+
+def analytic_ET(protocol, q_BSM, N, L_0_in, q_Fuse=None, m=1, t="Centralized", rtol=1e-9, link_model=None):
+    """E[T] (in time steps) predicted by the analytic rate model matching `make_sampler`."""
+    q_Fuse = q_BSM if q_Fuse is None else q_Fuse
+    if protocol == "Centralized":
+        return 1 / float(Rate_Factory(q_BSM, N, 1, L_0_in, link_model=link_model))
+    if protocol == "Decentralized":
+        return 1 / Rate_Decent_adaptive(q_BSM, q_Fuse, N, 1, L_0_in, rtol=rtol, link_model=link_model)[0]
+    if protocol == "2D":
+        return 1 / Rate_2D_adaptive(q_BSM, q_Fuse, N, 1, L_0_in, m, t, rtol=rtol, link_model=link_model)[0]
+    raise ValueError(f"protocol must be one of {PROTOCOLS}.")
+
+
+def iter_estimates(sample, n_samples, batch_size=10**5, confidence=0.95):
+    """Stream running estimates of E[T] while drawing n_samples in batches.
+
+    Yields, after every batch, a dict with the number of samples `n`, the running `mean`,
+    the sample standard deviation `std` and the half width `ci` of the normal confidence interval.
+    """
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    n, mean, m2 = 0, 0.0, 0.0
+    while n < n_samples:
+        batch = sample(min(batch_size, n_samples - n)).astype(float)
+        # Chan et al. update of the running mean and sum of squared deviations
+        n_b, mean_b = batch.size, batch.mean()
+        m2_b = np.sum((batch - mean_b) ** 2)
+        delta = mean_b - mean
+        total = n + n_b
+        mean += delta * n_b / total
+        m2 += m2_b + delta**2 * n * n_b / total
+        n = total
+        std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+        yield {"n": n, "mean": mean, "std": std, "ci": z * std / np.sqrt(n)}
+
+
+def simulate_ET(protocol, q_BSM, N, L_0_in, q_Fuse=None, m=1, t="Centralized", n_samples=10**6,
+                batch_size=10**5, seed=0, confidence=0.95, callback=None, link_model=None):
+    """Estimate E[T] by simulation and compare it with the analytic model.
+
+    Parameters
+    ----------
+    protocol, q_BSM, N, L_0_in, q_Fuse, m, t, link_model
+        See `make_sampler`.
+    n_samples : int
+        Number of protocol runs.
+    batch_size : int
+        Number of runs drawn at once.
+    seed : int
+        Seed of the random generator; the same seed and batch size reproduce the same estimate.
+    confidence : float
+        Confidence level of the reported interval.
+    callback : callable (optional)
+        Called with every running estimate from `iter_estimates`.
+
+    Returns
+    -------
+    result : dict
+        The final running estimate (`n`, `mean`, `std`, `ci`), plus the `analytic` E[T],
+        the difference `mean - analytic` as `abs_diff` and `rel_diff`, and `z_score`,
+        the difference in units of the standard error.
+
+    """
+    sample = make_sampler(protocol, q_BSM, N, L_0_in, q_Fuse=q_Fuse, m=m, t=t, rng=np.random.default_rng(seed),
+                          link_model=link_model)
+    for estimate in iter_estimates(sample, n_samples, batch_size, confidence):
+        if callback is not None:
+            callback(estimate)
+    analytic = analytic_ET(protocol, q_BSM, N, L_0_in, q_Fuse=q_Fuse, m=m, t=t, link_model=link_model)
+    abs_diff = estimate["mean"] - analytic
+    return {**estimate, "analytic": analytic, "abs_diff": abs_diff, "rel_diff": abs_diff / analytic,
+            "z_score": abs_diff / (estimate["std"] / np.sqrt(estimate["n"]))}
@@ -0,0 +1,163 @@
+"""
+Rate-fidelity Pareto frontier of network designs across a distance range.
+
+A candidate design is a set of keyword arguments of Joint.rate_and_fidelity (design, N, m,
+t, q_BSM, ...). At a distance L_0_in, the frontier holds the candidates whose rate and
+fidelity are not both matched or exceeded by another candidate. `pareto_frontier` finds the
+frontier at every distance of [L_min, L_max], down to a given resolution, and the distances
+where its membership changes.
+
+Instead of a full grid of candidates x distances it refines coarse to fine:
+
+1. every candidate is evaluated on a coarse geometric grid, in one vectorized call;
+2. on each interval between grid points a candidate's rate lies between its endpoint values,
+   since the rate decreases with distance. Its fidelity is taken to lie between its endpoint
+   values too. A candidate is dropped from an interval once another candidate's worst case
+   there matches or beats its best case in both rate and fidelity;
+3. only intervals whose frontier changes between the endpoints are halved, and the
+   midpoints are evaluated only for the candidates still in the interval.
+
+The fidelity bounds of step 2 are not certified: they hold wherever the fidelity is monotone
+between grid points, so the coarse grid has to resolve its extrema, or a frontier member can
+be dropped from an interval. tests/test_pareto.py checks the result against a brute-force
+grid of the same resolution.
+
+Only the centralized design and the 2D design with m = 1 and t = "Centralized" have a fidelity
+model (Joint.has_fidelity_model). The other candidates cannot be placed on the frontier: they
+are reported as skipped without being evaluated, and the result is flagged as not `complete`.
+With the default `design_space` that leaves out every decentralized design, so such a frontier
+does not compare centralized with decentralized switching. It also leaves a single m, so
+monotonicity in m is not used for pruning; the rate is not monotone in m anyway (an extra level
+stops paying off at large N, see Solvers.level_breakeven_N).
+"""
+from itertools import product
+
+import numpy as np
+from .Joint import DESIGNS, has_fidelity_model, rate_and_fidelity
+
+
+def design_space(N_values=(3, 4, 5), q_BSM_values=(0.98,), m_values=(1, 2), t_values=("Centralized", "Decentralized"),
+                 designs=DESIGNS):
+    """Candidate designs: every design with every N and q_BSM, and the 2D design also with every m and t."""
+    candidates = []
+    for design, N, q_BSM in product(designs, N_values, q_BSM_values):
+        if design == "2D":
+            candidates += [{"design": design, "N": N, "q_BSM": q_BSM, "m": m, "t": t}
+                           for m, t in product(m_values, t_values)]
+        else:
+            candidates.append({"design": design, "N": N, "q_BSM": q_BSM})
+    return candidates
+
+
+def _nondominated(rate, fidelity):
+    """Indices of the points not matched or exceeded in both objectives by another point."""
+    order = np.lexsort((-fidelity, -rate))  # by decreasing rate, then decreasing fidelity
+    front, best = [], -np.inf
+    for index in order:
+        if fidelity[index] > best:
+            front.append(index)
+            best = fidelity[index]
+    return sorted(front)
+
+
+def _undominated_on_interval(rate_lo, rate_hi, fidelity_lo, fidelity_hi):
+    """Mask of the candidates that no other candidate beats everywhere on an interval.
+
+    Candidate b is beaten everywhere if some candidate a has rate_lo[a] >= rate_hi[b] and
+    fidelity_lo[a] >= fidelity_hi[b], and a is not itself equal to b at both ends.
+    """
+    beats = (rate_lo[:, None] >= rate_hi[None, :]) & (fidelity_lo[:, None] >= fidelity_hi[None, :])
+    same = (rate_lo[:, None] == rate_lo[None, :]) & (rate_hi[:, None] == rate_hi[None, :]) & \
+        (fidelity_lo[:, None] == fidelity_lo[None, :]) & (fidelity_hi[:, None] == fidelity_hi[None, :])
+    np.fill_diagonal(beats, False)
+    return ~np.any(beats & ~same, axis=0)
+
+
+def pareto_frontier(candidates, L_min=1, L_max=300, coarse=17, levels=8, **common):
+    """Rate-fidelity Pareto frontier of candidates at the distances of [L_min, L_max].
+
+    Parameters
+    ----------
+    candidates : list of dict
+        Keyword arguments of Joint.rate_and_fidelity, one dict per design (see `design_space`).
+    L_min, L_max : float
+        Distance range (in km).
+    coarse : int
+        Number of points of the initial geometric distance grid.
+    levels : int
+        Number of halvings; switch distances are resolved as finely as on a full grid of
+        (coarse - 1) * 2^levels + 1 geometric points.
+    common
+        Further keyword arguments of Joint.rate_and_fidelity shared by all candidates, e.g. k_max.
+
+    Returns
+    -------
+    result : dict
+        `frontier`, a list by increasing distance of dicts with `L_0_in` and `members`, the
+        frontier candidates (their parameters plus `rate` and `fidelity`) by decreasing rate;
+        `switches`, the distances halfway (in log scale) between consecutive frontier
+        distances whose members differ; `evaluations`, the number of (candidate, distance)
+        evaluations of the candidates on the frontier; `full_grid_evaluations`, the number a
+        full grid of the same resolution would take for them; `skipped`, the candidates
+        without a fidelity model, which are neither evaluated nor on the frontier; and `complete`, False
+        whenever a candidate was skipped.
+
+    """
+    s_coarse = np.linspace(np.log(L_min), np.log(L_max), coarse)
+    values = {}  # log distance -> {candidate index: (rate, fidelity)}
+    kept, skipped = [], []
+    for index, candidate in enumerate(candidates):
+        if not has_fidelity_model(candidate["design"], candidate.get("m", 1), candidate.get("t", "Centralized")):
+            skipped.append(candidate)
+            continue
+        kept.append(index)
+        result = rate_and_fidelity(L_0_in=np.exp(s_coarse), **candidate, **common)
+        for s, rate, fidelity in zip(s_coarse, result["rate"], np.nan_to_num(result["fidelity"], nan=-np.inf)):
+            values.setdefault(s, {})[index] = (rate, fidelity)
+    evaluations = len(kept) * coarse
+
+    def members(s):
+        point = values[s]
+        indices = list(point)
+        rate = np.array([point[i][0] for i in indices])
+        fidelity = np.array([point[i][1] for i in indices])
+        return {indices[i] for i in _nondominated(rate, fidelity)}
+
+    # Intervals (s_a, s_b, candidates still in the interval)
+    intervals = [(s_a, s_b, kept) for s_a, s_b in zip(s_coarse[:-1], s_coarse[1:])] if kept else []
+    for _ in range(levels):
+        to_split = []
+        for s_a, s_b, active in intervals:
+            ends = np.array([[values[s_a][i], values[s_b][i]] for i in active])  # (candidate, end, objective)
+            inside = _undominated_on_interval(ends[:, 1, 0], ends[:, 0, 0],
+                                              ends[:, :, 1].min(axis=1), ends[:, :, 1].max(axis=1))
+            active = [i for i, keep in zip(active, inside) if keep]
+            if len(active) > 1 and members(s_a) != members(s_b):
+                to_split.append((s_a, s_b, active))
+        if not to_split:
+            break
+        midpoints = {}  # candidate index -> log distances to evaluate it at
+        for s_a, s_b, active in to_split:
+            for i in active:
+                midpoints.setdefault(i, []).append((s_a + s_b) / 2)
+        for i, s_mid in midpoints.items():
+            result = rate_and_fidelity(L_0_in=np.exp(np.array(s_mid)), **candidates[i], **common)
+            evaluations += len(s_mid)
+            for s, rate, fidelity in zip(s_mid, result["rate"], np.nan_to_num(result["fidelity"], nan=-np.inf)):
+                values.setdefault(s, {})[i] = (rate, fidelity)
+        intervals = [half for s_a, s_b, active in to_split
+                     for half in ((s_a, (s_a + s_b) / 2, active), ((s_a + s_b) / 2, s_b, active))]
+
+    frontier, switches, previous = [], [], None
+    for s in sorted(values):
+        current = members(s)
+        ordered = sorted(current, key=lambda i: -values[s][i][0])
+        frontier.append({"L_0_in": float(np.exp(s)),
+                         "members": [{**candidates[i], "rate": float(values[s][i][0]),
+                                      "fidelity": float(values[s][i][1])} for i in ordered]})
+        if previous is not None and current != previous[1]:
+            switches.append(float(np.exp((previous[0] + s) / 2)))
+        previous = (s, current)
+    return {"frontier": frontier, "switches": switches, "evaluations": evaluations,
+            "full_grid_evaluations": len(kept) * ((coarse - 1) * 2**levels + 1), "skipped": skipped,
+            "complete": not skipped}
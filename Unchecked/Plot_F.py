@@ -1,44 +1,69 @@
-from Leading_F import factory_fidelity
-from TwoD_Leading_F import TwoD_network_fidelity
-from Rate_func import Rate_Factory
+"""
+Fidelity of the child GHZ state and of its 2D parent as a function of the neighboring distance.
+
+    python -m Unchecked.Plot_F
+"""
 import numpy as np
-import matplotlib.pyplot as plt
+from .Joint import rate_and_fidelity
+from .Sampling import adaptive_sample
+from .TwoD_Leading_F import TwoD_network_fidelity
+
 
-# Define parameters
-L_0_in = np.linspace(1e-3, 500, 100000)  # Start from a small number close to 0
-mem_depolar_prob = 1e-2
-link_depolar_prob = 0
-bsm_depolar_prob = 0
-bsm_success_prob = 0.98
-ghz_fidelity = 1
+def fidelity_curves(num_remote_nodes, L_0_in, mem_depolar_prob=1e-2, link_depolar_prob=0, bsm_depolar_prob=0,
+                    bsm_success_prob=0.98, ghz_fidelity=1):
+    """F_target of the child and F_TwoDim of its 2D parent at the distances L_0_in (in km), stacked."""
+    # The child is a GHZ factory at L_0_in / 2: its rate (the GHZ success probability per slot)
+    # and F_target come from one joint evaluation on the same link model
+    child = rate_and_fidelity("Centralized", num_remote_nodes, L_0_in / 2, q_BSM=bsm_success_prob, delta_t=1,
+                              mem_depolar_prob=mem_depolar_prob, link_depolar_prob=link_depolar_prob,
+                              bsm_depolar_prob=bsm_depolar_prob, ghz_fidelity=ghz_fidelity)
+    F_target = child["fidelity"]
 
-# Define different colors for plotting
-colors = ['b', 'r']
+    # Compute F_TwoDim fidelity
+    F_TwoDim = TwoD_network_fidelity(num_remote_nodes, child["rate"], mem_depolar_prob,
+                                     bsm_depolar_prob, F_target)
+    return np.stack(np.broadcast_arrays(F_target, F_TwoDim))
 
-# Plotting
-plt.figure(figsize=(8, 5))
 
-for idx, num_remote_nodes in enumerate([3, 4]):
-    # Compute GHZ success probability
-    GHZ_success_prob = Rate_Factory(q_BSM=bsm_success_prob, N=num_remote_nodes, 
-                                    delta_t=1, L_0_in=(L_0_in/2))
+def plot_fidelity(L_0_in=None, mem_depolar_prob=1e-2, link_depolar_prob=0, bsm_depolar_prob=0,
+                  bsm_success_prob=0.98, ghz_fidelity=1, nodes=(3, 4), tol=1e-3):
+    """Plot F_target and F_TwoDim against L_0_in (in km) for every number of remote nodes in `nodes`.
 
-    # Compute F_target fidelity
-    F_target = factory_fidelity(num_remote_nodes, (L_0_in/2), mem_depolar_prob, link_depolar_prob,
-                                bsm_depolar_prob, ghz_fidelity)
+    Without an explicit L_0_in, each pair of curves is sampled on (1e-3, 500] km with
+    `adaptive_sample`, to within tol of the plot height.
+    """
+    import matplotlib.pyplot as plt
+
+    params = (mem_depolar_prob, link_depolar_prob, bsm_depolar_prob, bsm_success_prob, ghz_fidelity)
+
+    # Define different colors for plotting
+    colors = ['b', 'r', 'g', 'm', 'c']
+
+    # Plotting
+    plt.figure(figsize=(8, 5))
+
+    for idx, num_remote_nodes in enumerate(nodes):
+        if L_0_in is None:
+            # Start from a small number close to 0
+            distances, (F_target, F_TwoDim) = adaptive_sample(
+                lambda L: fidelity_curves(num_remote_nodes, L, *params), 1e-3, 500, tol)
+        else:
+            distances = L_0_in
+            F_target, F_TwoDim = fidelity_curves(num_remote_nodes, L_0_in, *params)
+
+        # Plot F_target and F_TwoDim for each num_remote_nodes
+        color = colors[idx % len(colors)]
+        plt.plot(distances, F_target, label=f"F_target (N={num_remote_nodes})", color=color)
+        plt.plot(distances, F_TwoDim, label=f"F_TwoDim (N={num_remote_nodes})", color=color, linestyle='dashed')
+
+    plt.xlabel("Neighboring Distance (km)")
+    plt.ylabel("Fidelity")
+    plt.ylim((0, 1))
+    plt.title("Fidelity of the child and its parent for " + " and ".join(f"{N}-GHZ" for N in nodes))
+    plt.legend()
+    plt.grid(True)
+    plt.show()
 
-    # Compute F_TwoDim fidelity
-    F_TwoDim = TwoD_network_fidelity(num_remote_nodes, GHZ_success_prob, mem_depolar_prob, 
-                                     bsm_depolar_prob, F_target)
 
-    # Plot F_target and F_TwoDim for each num_remote_nodes
-    plt.plot(L_0_in, F_target, label=f"F_target (N={num_remote_nodes})", color=colors[idx])
-    plt.plot(L_0_in, F_TwoDim, label=f"F_TwoDim (N={num_remote_nodes})", color=colors[idx], linestyle='dashed')
-
-plt.xlabel("Neighboring Distance (km)")
-plt.ylabel("Fidelity")
-plt.ylim((0, 1))
-plt.title("Fidelity of the child and its parent for 3-GHZ and 4-GHZ")
-plt.legend()
-plt.grid(True)
-plt.show()
+if __name__ == "__main__":
+    plot_fidelity()
@@ -0,0 +1,263 @@
+"""
+Ref: Mohadeseh Azari / Department of Informatics and Networked Systems /
+School of Computing and Information / University of Pittsburgh /
+Pittsburgh,PA / moa125@pitt.edu
+----
+Python counterpart of Rate_2D.m, F_T_max.m and link_gen_prob.m in
+Average_Entanglement_Distribution_Rate/: the average rate of distributing
+N-qubit GHZ entanglement through an m-level 2D repeater, with either a
+centralized or a decentralized switch generating the parent entanglement.
+
+F_T_max.m re-evaluates the lower levels for every k. Here each level is
+tabulated once for k = 1..k_max and the next level is built from the
+previous table, reusing it at every floor(k/u).
+"""
+import numpy as np
+from .Instrument import instrumented
+from .Links import resolve
+from .Rate_func import (_CHUNK_ELEMENTS, _adaptive_tail_sum, _decent_link_cdf, _expected_max_geometric,
+                       _extend_decent_link_cdf, _geometric_weights, _mixture_cdf_increments, _truncation_error)
+
+MODEL_VERSION = 2
+
+
+def _check_type(t):
+    """Check that t names one of the two switch types."""
+    if t.lower() not in ("centralized", "decentralized"):
+        raise ValueError("Invalid type t. Use either 'Centralized' or 'Decentralized'.")
+
+
+def link_gen_prob(t, L_0_in, m, N, link_model=None):
+    """
+    link_gen_prob computes the probability of successful link generation q_link
+    based on repeater type (centralized/decentralized), system parameters, and geometry.
+
+    Parameters:
+      t          - 'Centralized' or 'Decentralized'
+      L_0_in     - Base distance (before scaling), in km
+      m          - Hierarchical level in the repeater structure
+      N          - Number of nodes/qubits
+      link_model - Links.LinkModel of the elementary links (default: DEFAULT_LINK_MODEL)
+
+    Returns:
+      q_link_values - Probability of successful link generation (array)
+    """
+    _check_type(t)
+    # L = L_0_in / (2^m * 2 * sin(pi / N)) for centralized, L_0_in / (2^m * 2) for decentralized
+    geometry = "factory" if t.lower() == "centralized" else "decentralized"
+    return resolve(link_model).q_link(geometry, L_0_in, N, m)
+
+
+def _mixture_cdf(success_prob, base_cdf):
+    """
+    F(k) = sum_u P(u) * B(floor(k/u)) for k = 1..k_max, where u is geometric
+    with success probability success_prob and base_cdf[k-1] = B(k).
+    """
+    k_max = base_cdf.shape[0]
+    weights = _geometric_weights(success_prob, k_max)
+    base_increments = np.diff(base_cdf, axis=0, prepend=0)
+    return np.cumsum(_mixture_cdf_increments(weights, base_increments, 0, k_max), axis=0)
+
+
+@instrumented
+def F_T_max_table(k_max, m, N, q_BSM, q_Fuse, q_link_values, t):
+    """
+    F_T_max_table tabulates the CDF of the maximum completion time T_max of an
+    m-level hierarchical repeater, i.e. F_T_max.m evaluated at every k = 1..k_max.
+
+    Parameters:
+      k_max          - Number of time slots to tabulate
+      m              - Recursion level (m=1 means one level above physical links)
+      N              - Number of qubits (nodes) at each level
+      q_BSM          - Success probability of a Bell-state measurement (BSM)
+      q_Fuse         - Success probability of a fusion operation
+      q_link_values  - 1-D array of elementary link success probabilities
+      t              - 'Centralized' or 'Decentralized'
+
+    Returns:
+      F - Array of shape (k_max, len(q_link_values)); F[k-1] = F_T_max(k)
+    """
+    _check_type(t)
+    q_link_values = np.asarray(q_link_values, dtype=float)
+    if t.lower() == "centralized":
+        # CDF of max of N link-level attempts, mixed over the teleportation rounds
+        exponent = np.arange(1, k_max + 1)[:, None]
+        F_n2_max = (1 - (1 - q_link_values) ** exponent) ** N
+        F_T = _mixture_cdf(q_BSM**N, F_n2_max) ** N
+    else:
+        # CDF of the slowest branch of the switch, mixed over the fusion rounds
+        F_n_i = _decent_link_cdf(q_BSM, q_link_values, k_max)
+        F_T = _mixture_cdf(q_Fuse**N, F_n_i**N) ** N
+
+    # Each higher level waits for N lower-level GHZ states and fuses them;
+    # the parent fusion succeeds with q_fuse = q_BSM^(N choose 2)
+    for _ in range(m - 1):
+        F_T = _mixture_cdf(q_BSM**(N * (N - 1) / 2), F_T) ** N
+    return F_T
+
+
+def _level_probs(q_BSM, q_Fuse, N, m, centralized):
+    """Success probability of the rounds mixed in at level 1, 2, ..., m."""
+    return [q_BSM**N if centralized else q_Fuse**N] + [q_BSM**(N * (N - 1) / 2)] * (m - 1)
+
+
+def _extend_level_tables(state, q_link, k_lo, k_hi, m, N, q_BSM, q_Fuse, centralized, k_limit):
+    """
+    Rows k_lo < k <= k_hi of every level of F_T_max_table for the 1-D array q_link.
+
+    state keeps the level tables, in buffers grown in place to at most k_limit
+    rows, and the last CDF rows, so that continuing to a larger k never
+    recomputes the first k_lo rows (state is empty for k_lo = 0). Returns a
+    dict of the new rows: "T_0" at the link level, "Y_l" (one of the N copies
+    whose max is taken) and "T_l" at level l = 1..m, and "F_n_i" for a
+    decentralized switch.
+    """
+    rows = {}
+    # Level 0: max over N links (centralized) or over the N branches of the switch
+    if centralized:
+        exponent = np.arange(k_lo + 1, k_hi + 1)[:, None]
+        rows["T_0"] = (1 - (1 - q_link) ** exponent) ** N
+    else:
+        rows["F_n_i"] = _extend_decent_link_cdf(state, q_BSM, q_link, k_lo, k_hi)
+        rows["T_0"] = rows["F_n_i"] ** N
+
+    for level, success_prob in enumerate(_level_probs(q_BSM, q_Fuse, N, m, centralized), start=1):
+        table = state.get(f"table_{level - 1}")
+        if table is None or table.shape[0] < k_hi:
+            # Grow the buffer to twice the rows needed, so the next pass fills it in place
+            grown = np.empty((max(k_hi, min(2 * k_hi, k_limit)), q_link.size))
+            grown[:k_lo] = table[:k_lo] if k_lo else 0
+            state[f"table_{level - 1}"] = table = grown
+        table[k_lo:k_hi] = rows[f"T_{level - 1}"]
+        dF_Y = _mixture_cdf_increments(_geometric_weights(success_prob, k_hi),
+                                       np.diff(table[:k_hi], axis=0, prepend=0), k_lo, k_hi)
+        rows[f"Y_{level}"] = state.get(f"F_Y_{level}", 0) + np.cumsum(dF_Y, axis=0)
+        state[f"F_Y_{level}"] = rows[f"Y_{level}"][-1]
+        rows[f"T_{level}"] = rows[f"Y_{level}"] ** N
+    return rows
+
+
+@instrumented
+def Rate_2D(q_BSM, q_Fuse, N, delta_t, L_0_in, m, k_max, t, link_model=None):
+    """
+    Rate_2D computes the average rate for distributing N-qubit GHZ entanglement
+    through an m-level 2D repeater approach, utilizing an either centralized or
+    decentralized switch for the generation of the parent entanglement.
+
+    Parameters:
+      q_BSM    - Success probability of a Bell-state measurement (BSM)
+      q_Fuse   - Success probability of a fusion operation
+      N        - Number of qubits/nodes involved in GHZ entanglement
+      delta_t  - Time duration of a single attempt (time step in s)
+      L_0_in   - The final distance between neighboring nodes (in km)
+      m        - The number of 2D repeater generations (children) in the network
+      k_max    - Maximum number of time slots to consider
+      t        - 'Centralized' or 'Decentralized'
+      link_model - Links.LinkModel of the elementary links (default: DEFAULT_LINK_MODEL)
+
+    Returns:
+      Rate_out - Average entanglement distribution rate
+    """
+    return _rate_2d(q_BSM, q_Fuse, N, delta_t, link_gen_prob(t, L_0_in, m, N, link_model), m, k_max, t)
+
+
+def _rate_2d(q_BSM, q_Fuse, N, delta_t, q_link_values, m, k_max, t):
+    """Rate_2D for given link success probabilities."""
+    q_link_values = np.atleast_1d(q_link_values)
+
+    ETmax = np.zeros(q_link_values.shape)
+    q_flat = q_link_values.ravel()
+    ET_flat = ETmax.reshape(-1)
+    step = max(1, _CHUNK_ELEMENTS // k_max)
+    for start in range(0, q_flat.size, step):
+        # The probability that the parent hasn't finished by time k*delta_t is 1 - F_T_max(k)
+        F_T = F_T_max_table(k_max, m, N, q_BSM, q_Fuse, q_flat[start:start + step], t)
+        ET_flat[start:start + step] = delta_t * np.sum(1 - F_T, axis=0)
+
+    # Expected time to have all the parents ready and having all final BSM succeed simultaneously
+    Rate_out = q_BSM**(N * (N - 1) / 2) / ETmax
+
+    # If the output is a single value array, return a scalar
+    if Rate_out.size == 1:
+        return Rate_out.item()
+    return Rate_out
+
+
+@instrumented
+def Rate_2D_adaptive(q_BSM, q_Fuse, N, delta_t, L_0_in, m, t, rtol=1e-6, k_start=1024, k_limit=2 ** 22,
+                     link_model=None):
+    """
+    Rate_2D_adaptive calculates the same rate as Rate_2D, but instead of a
+    fixed k_max it extends the level tables per q_link value until a bound on
+    the neglected tail is below rtol relative to the sum.
+
+    Every level is a max over N copies of Y = u * T_below, with u geometric and
+    independent of the lower-level time T_below, so E[Y] = E[u] * E[T_below].
+    Starting from the exactly known mean at the link level, each level turns
+    an upper bound on E[T_below] into one on its own tail:
+    sum_{k>K} (1 - F_T(k)) <= N * (E[u] * E[T_below] - sum_{k=0}^{K} (1 - F_Y(k))).
+    Every level feeds N + 1 running sums into the bound of the next, so Rate_err
+    adds an allowance of (N + 1)^m * k_stop * eps relative for their rounding (see
+    Rate_func._truncation_error). rtol should stay well above it, or every value
+    runs to k_limit.
+
+    Parameters:
+      q_BSM    - Success probability of a Bell-state measurement (BSM)
+      q_Fuse   - Success probability of a fusion operation
+      N        - Number of qubits/nodes involved in GHZ entanglement
+      delta_t  - Time duration of a single attempt (time step in s)
+      L_0_in   - The final distance between neighboring nodes (in km)
+      m        - The number of 2D repeater generations (children) in the network
+      t        - 'Centralized' or 'Decentralized'
+      rtol     - Requested relative error of the rate
+      k_start  - Number of time slots in the first pass
+      k_limit  - Largest number of time slots to consider
+      link_model - Links.LinkModel of the elementary links (default: DEFAULT_LINK_MODEL)
+
+    Returns:
+      Rate_out - Average entanglement distribution rate; equal to Rate_2D
+                 with k_max = k_stop
+      Rate_err - Bound on |Rate_out minus the untruncated rate|, tail and rounding
+      k_stop   - Number of time slots at which the sum was stopped
+    """
+    q_link_values = np.atleast_1d(link_gen_prob(t, L_0_in, m, N, link_model))
+    centralized = t.lower() == "centralized"
+    q_parent = q_BSM**(N * (N - 1) / 2)
+    level_probs = _level_probs(q_BSM, q_Fuse, N, m, centralized)
+
+    def extend(state, q_link, k_lo, k_hi):
+        if k_lo == 0:
+            if centralized:
+                state["E_0"] = _expected_max_geometric(N, q_link)
+            else:
+                state["S_n_i"] = np.ones(q_link.size)
+                state["E_n_i"] = _expected_max_geometric(2, q_link) / q_BSM
+            state["S_0"] = np.ones(q_link.size)
+            for level in range(1, m + 1):
+                state[f"S_Y_{level}"] = np.ones(q_link.size)  # sum_{k=0}^{k_lo} (1 - F_Y(k))
+                state[f"S_{level}"] = np.ones(q_link.size)    # sum_{k=0}^{k_lo} (1 - F_T(k))
+
+        rows = _extend_level_tables(state, q_link, k_lo, k_hi, m, N, q_BSM, q_Fuse, centralized, k_limit)
+        state["S_0"] += np.sum(1 - rows["T_0"], axis=0)
+        if not centralized:
+            state["S_n_i"] += np.sum(1 - rows["F_n_i"], axis=0)
+            state["E_0"] = state["S_0"] + N * np.maximum(state["E_n_i"] - state["S_n_i"], 0)
+
+        E_bound = state["E_0"]  # upper bound on E[T] at the level below
+        for level in range(1, m + 1):
+            state[f"S_Y_{level}"] += np.sum(1 - rows[f"Y_{level}"], axis=0)
+            state[f"S_{level}"] += np.sum(1 - rows[f"T_{level}"], axis=0)
+            E_Y_bound = E_bound / level_probs[level - 1]
+            E_bound = state[f"S_{level}"] + N * np.maximum(E_Y_bound - state[f"S_Y_{level}"], 0)
+
+        # Rate_2D sums 1 - F_T_max(k) from k = 1
+        return state[f"S_{m}"] - 1, E_bound - state[f"S_{m}"]
+
+    ETmax, tail, k_stop = _adaptive_tail_sum(extend, q_link_values, rtol, k_start, k_limit)
+    Rate_out = q_parent / (delta_t * ETmax)
+    Rate_err = _truncation_error(Rate_out, ETmax, tail, k_stop, (N + 1) ** m)
+
+    Rate_out, Rate_err, k_stop = (a.reshape(q_link_values.shape) for a in (Rate_out, Rate_err, k_stop))
+    if Rate_out.size == 1:
+        return Rate_out.item(), Rate_err.item(), k_stop.item()
+    return Rate_out, Rate_err, k_stop
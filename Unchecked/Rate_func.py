@@ -1,34 +1,238 @@
+from math import isqrt
+
 import numpy as np
-from scipy.special import comb  # For binomial coefficient
+from .Instrument import count, instrumented
+from .Links import resolve
 
-def Rate_Factory(q_BSM, N, delta_t, L_0_in):
-    L_o = L_0_in / (2 * np.sin(np.pi / N))
+MODEL_VERSION = 2
+
+# Upper bound on the number of CDF table entries (time slots x sweep points) held in memory at once
+_CHUNK_ELEMENTS = 2 ** 22
 
-    etha_c = 0.95
-    L_att = 20  # in km
-    q_link_values = 0.5 * etha_c**2 * np.exp(-L_o / L_att)
-    
-    ExpT = np.zeros_like(q_link_values)  # To store E[T] for each q_link
 
-    # Compute E[T] for each q_link
-    for idx, q_link in enumerate(q_link_values):
-        sum_term = 0
+@instrumented
+def _expected_max_geometric(N, q_link_values, derivatives=False):
+    """
+    E[max{n_1, ..., n_N}] of N independent geometric(q_link) attempt counts,
+    element-wise over the array q_link_values.
+
+    The textbook alternating sum
+        sum_j (-1)^(j+1) * C(N, j) / (1 - (1 - q_link)^j)
+    cancels catastrophically beyond N of a few tens. Instead we condition on
+    the first attempt: if j of the n pending links succeed, n - j remain, so
+        M_n * (1 - (1 - q)^n) = 1 + sum_{j=1}^{n-1} P(j of n succeed) * M_{n-j}.
+    Every term is positive, so the recursion stays accurate for N in the
+    hundreds and has no truncation error. The binomial probabilities are
+    updated row by row with Pascal's rule, which costs O(N^2) multiply-adds
+    per q_link value and never forms a binomial coefficient.
 
-        # Compute the summation term
-        for j in range(1, N + 1):
-            binomial_coeff = comb(N, j, exact=True)  # Compute binomial coefficient (N choose j)
-            fraction_term = 1 / (1 - (1 - q_link)**j)
-            sum_term += (-1)**(j + 1) * binomial_coeff * fraction_term
+    With derivatives=True, returns (E[max], dE[max]/dq_link): the recursion is
+    differentiated term by term, with d(1 - (1 - q)^n)/dq = n (1 - q)^(n-1)
+    and the pmf derivative following Pascal's rule too.
+    """
+    q = np.asarray(q_link_values, dtype=float)
+    s = 1 - q
+    M = np.zeros((N + 1,) + q.shape)
+    dM = np.zeros((N + 1,) + q.shape) if derivatives else None
+    zero = np.zeros((1,) + q.shape)
+    pmf = np.ones((1,) + q.shape)  # P(j of n links succeed), j = 0..n, for n = 0
+    dpmf = zero
+    with np.errstate(divide="ignore", invalid="ignore" if derivatives else "warn"):
+        log_s = np.log1p(-q)
+        for n in range(1, N + 1):
+            if derivatives:
+                dpmf = np.concatenate([dpmf * s - pmf, zero]) + np.concatenate([zero, dpmf * q + pmf])
+            pmf = np.concatenate([pmf * s, zero]) + np.concatenate([zero, pmf * q])
+            pending = 1 + np.sum(pmf[1:n] * M[n - 1:0:-1], axis=0)
+            all_done = -np.expm1(n * log_s)  # 1 - (1 - q)^n
+            M[n] = pending / all_done
+            if derivatives:
+                dpending = np.sum(dpmf[1:n] * M[n - 1:0:-1] + pmf[1:n] * dM[n - 1:0:-1], axis=0)
+                dM[n] = (dpending - M[n] * n * s ** (n - 1)) / all_done
+    return (M[N], dM[N]) if derivatives else M[N]
 
-        # Compute E[T] using the given expression
-        ExpT[idx] = (delta_t / q_BSM**N) * sum_term
+
+@instrumented
+def Rate_Factory(q_BSM, N, delta_t, L_0_in, link_model=None):
+    q_link_values = resolve(link_model).q_link("factory", L_0_in, N)
+    return _rate_factory(q_BSM, N, delta_t, q_link_values)
+
+
+def _rate_factory(q_BSM, N, delta_t, q_link_values):
+    """Rate_Factory for given link success probabilities."""
+    # E[T]: wait for all N links, then all N BSMs must succeed
+    ExpT = (delta_t / q_BSM**N) * _expected_max_geometric(N, q_link_values)
 
     Rate_Overall = 1 / ExpT
     return Rate_Overall
 
 
+@instrumented
+def _mixture_cdf_increments(weights, base_increments, k_lo, k_hi):
+    """
+    Increments F(k) - F(k-1), for k_lo < k <= k_hi, of the CDF
+        F(k) = sum_u weights[u-1] * B(floor(k/u)),
+    i.e. of the product u * v of an independent u ~ weights and v ~ B.
+
+    B is a CDF with B(0) = 0, passed through its increments
+    base_increments[v-1] = B(v) - B(v-1) for v = 1..k_hi. Any trailing axes of
+    base_increments are independent sweep points and are carried along.
+
+    F(k) - F(k-1) only collects the pairs (u, v) with u * v = k, so instead of
+    the O(k^2) double loop the table is filled by a divisor sieve. Below
+    sqrt(k_hi) we loop over u; above it every block of u sharing the same
+    floor(k_hi/u) is handled at once by looping over v. That is O(sqrt(k_hi))
+    vectorized steps and O(k_hi log k_hi) arithmetic per sweep point.
+    """
+    dF = np.zeros((k_hi - k_lo,) + base_increments.shape[1:])
+    nonzero = np.flatnonzero(weights[:k_hi])
+    if nonzero.size == 0:
+        return dF
+    u_top = nonzero[-1] + 1  # weights beyond this underflowed to exactly 0
+    s = isqrt(k_hi)
+    for u in range(1, min(s, u_top) + 1):
+        v_lo, v_hi = k_lo // u + 1, k_hi // u
+        if v_lo <= v_hi:
+            dF[u * v_lo - k_lo - 1:u * v_hi - k_lo:u] += weights[u - 1] * base_increments[v_lo - 1:v_hi]
+    if u_top > s:
+        for v in range(1, k_hi // (s + 1) + 1):
+            u_lo, u_hi = max(s, k_lo // v) + 1, min(k_hi // v, u_top)
+            if u_lo <= u_hi:
+                w = weights[u_lo - 1:u_hi].reshape((-1,) + (1,) * (base_increments.ndim - 1))
+                dF[v * u_lo - k_lo - 1:v * u_hi - k_lo:v] += w * base_increments[v - 1]
+    count("sieve_steps", min(s, u_top) + (k_hi // (s + 1) if u_top > s else 0))
+    return dF
+
+
+def _geometric_weights(success_prob, k_max):
+    """P(u) = (1 - success_prob)^(u-1) * success_prob for u = 1..k_max."""
+    return (1 - success_prob) ** np.arange(k_max) * success_prob
+
+
+def _geometric_weights_grad(success_prob, k_max):
+    """d/dsuccess_prob of `_geometric_weights`: (1 - p)^(u-2) * (1 - u p) for u >= 2, and 1 for u = 1."""
+    u = np.arange(1, k_max + 1)
+    return np.where(u == 1, 1, (1 - success_prob) ** np.maximum(u - 2, 0) * (1 - u * success_prob))
+
+
+def _dist_increments(q_link_values, k_max):
+    """
+    Increments of the CDF [1 - (1 - q_link)^v]^2 of n_dist for v = 1..k_max
+    (rows), for each q_link in the 1-D array q_link_values (columns).
+    """
+    s = 1 - q_link_values
+    s_prev = s ** np.arange(k_max)[:, None]  # (1 - q_link)^(v-1)
+    # [1 - s^v]^2 - [1 - s^(v-1)]^2, written without the cancellation of the plain difference
+    return s_prev * q_link_values * (2 - s_prev - s_prev * s)
+
+
+def _dist_increments_grad(q_link_values, k_max):
+    """d/dq_link of `_dist_increments`, from d[1 - s^v]^2/dq = 2 v s^(v-1) (1 - s^v), s = 1 - q_link."""
+    s = 1 - q_link_values
+    v = np.arange(1, k_max + 1)[:, None]
+    dG = 2 * v * s ** (v - 1) * (1 - s ** v)
+    return np.diff(dG, axis=0, prepend=0)
+
+
+def _decent_link_cdf(q_BSM, q_link_values, k_max, derivatives=False):
+    """
+    CDF table F_n_i(k), k = 1..k_max (rows), of n_i = n_BSM * n_dist for each
+    q_link in the 1-D array q_link_values (columns).
+
+    With derivatives=True the table has shape (k_max, 3, len(q_link_values)),
+    holding F_n_i, dF_n_i/dq_link and dF_n_i/dq_BSM along its second axis.
+    """
+    return _extend_decent_link_cdf({}, q_BSM, q_link_values, 0, k_max, derivatives)
+
+
+def _extend_decent_link_cdf(state, q_BSM, q_link_values, k_lo, k_hi, derivatives=False):
+    """
+    Rows k_lo < k <= k_hi of the table of _decent_link_cdf. The last row is
+    kept in state["F_n_i"], so that a table can be continued to larger k
+    without recomputing its first k_lo rows (state is empty for k_lo = 0).
+    """
+    weights = _geometric_weights(q_BSM, k_hi)  # P(n_BSM = u)
+    dist_increments = _dist_increments(q_link_values, k_hi)
+    if not derivatives:
+        dF = _mixture_cdf_increments(weights, dist_increments, k_lo, k_hi)
+    else:
+        # The sieve is bilinear in the weights and the increments: d/dq_link runs through the same
+        # call as the value, as a second sweep column, and d/dq_BSM through one more call with
+        # dP(n_BSM = u)/dq_BSM
+        stacked = np.stack([dist_increments, _dist_increments_grad(q_link_values, k_hi)], axis=1)
+        dF = np.concatenate([_mixture_cdf_increments(weights, stacked, k_lo, k_hi),
+                             _mixture_cdf_increments(_geometric_weights_grad(q_BSM, k_hi), dist_increments,
+                                                     k_lo, k_hi)[:, None]], axis=1)
+    F_n_i = state.get("F_n_i", 0) + np.cumsum(dF, axis=0)
+    state["F_n_i"] = F_n_i[-1]
+    return F_n_i
+
+
+def _truncation_error(Rate_out, partial, tail, k_stop, num_sums):
+    """
+    Bound on |Rate_out - untruncated rate| for a rate inversely proportional to a tail sum.
+
+    The untruncated sum lies in [partial, partial + tail], up to the rounding of the
+    running sums. Each of the num_sums sums of k_stop terms that enter partial and tail
+    is allowed an error of k_stop * eps relative to partial, i.e. the rounding
+    allowance is num_sums * k_stop * eps * partial.
+    """
+    rounding = num_sums * k_stop * np.finfo(float).eps * partial
+    return Rate_out * (tail + rounding) / (partial - rounding)
+
+
+def _adaptive_tail_sum(extend, q_link_values, rtol, k_start, k_limit, item_ndim=0):
+    """
+    Drive a tail sum over k per q_link value until the bound on its remainder is small.
+
+    extend(state, q_link, k_lo, k_hi) adds the time slots k_lo < k <= k_hi for
+    the 1-D array q_link, keeping whatever it needs to continue in the dict
+    state (initially empty, every entry with q_link along its last axis), and
+    returns (partial, tail): the partial sum up to k_hi and an upper bound on
+    the remainder beyond k_hi. With item_ndim > 0 the trailing item_ndim axes
+    of q_link_values belong to a single sum (e.g. one q_link per node), so
+    q_link has those axes after the first one.
+
+    k doubles from k_start until tail <= rtol * partial or k reaches k_limit.
+    Converged values drop out, so each q_link value stops at its own k, and
+    groups of values are split whenever their tables would exceed
+    _CHUNK_ELEMENTS entries.
+
+    Returns:
+      partial - Partial sum at the k where each value stopped
+      tail    - Bound on the neglected remainder of the sum
+      k_stop  - Number of time slots summed
+    """
+    q_link_values = np.atleast_1d(q_link_values)
+    item_shape = q_link_values.shape[q_link_values.ndim - item_ndim:]
+    q_flat = q_link_values.reshape((-1,) + item_shape)
+    item_size = int(np.prod(item_shape))
+    partial_out = np.zeros(len(q_flat))
+    tail_out = np.zeros(len(q_flat))
+    k_stop = np.zeros(len(q_flat), dtype=int)
+    pending = [(np.arange(len(q_flat)), {}, 0)]
+    while pending:
+        cols, state, k_lo = pending.pop()
+        k_hi = min(k_start if k_lo == 0 else 2 * k_lo, k_limit)
+        if cols.size > 1 and k_hi * cols.size * item_size > _CHUNK_ELEMENTS:
+            half = cols.size // 2
+            for part in (slice(half, None), slice(None, half)):
+                pending.append((cols[part], {key: a[..., part] for key, a in state.items()}, k_lo))
+            continue
+        partial, tail = extend(state, q_flat[cols], k_lo, k_hi)
+        count("tail_passes")
+        done = (tail <= rtol * partial) | (k_hi >= k_limit)
+        partial_out[cols[done]] = partial[done]
+        tail_out[cols[done]] = tail[done]
+        k_stop[cols[done]] = k_hi
+        if not done.all():
+            keep = ~done
+            pending.append((cols[keep], {key: a[..., keep] for key, a in state.items()}, k_hi))
+    return partial_out, tail_out, k_stop
+
 
-def Rate_Decent(q_BSM, q_Fuse, N, delta_t, L_0_in, k_max):
+@instrumented
+def Rate_Decent(q_BSM, q_Fuse, N, delta_t, L_0_in, k_max, method="fast", link_model=None):
     """
     Rate_Decent calculates the average GHZ entanglement distribution rate
     for an N-qubit system using a decentralized switching approach.
@@ -40,24 +244,52 @@ def Rate_Decent(q_BSM, q_Fuse, N, delta_t, L_0_in, k_max):
       delta_t  - Time duration of a single attempt (time step in s)
       L_0_in   - The final distance between neighboring nodes (in km)
       k_max    - Maximum number of time slots to consider
+      method   - "fast" (default) builds the CDF tables of all q_link values
+                 at once with a divisor sieve, in O(k_max log k_max) per value;
+                 "reference" is the original O(k_max^2) double loop, kept to
+                 check the fast engine against
+      link_model - Links.LinkModel of the elementary links (default: DEFAULT_LINK_MODEL)
 
     Returns:
       Rate_out - Average entanglement distribution rate (inverse of E[T_max])
     """
-    
-    L_o = L_0_in / 2   # element-wise division if L_0_in is an array
-    etha_c = 0.95      # Coupling efficiency
-    L_att  = 20        # Attenuation length (in km)
+    # Compute overall link success probability; the links span half the neighbor distance
+    q_link_values = resolve(link_model).q_link("decentralized", L_0_in)
+    return _rate_decent(q_BSM, q_Fuse, N, delta_t, q_link_values, k_max, method)
 
-    # Compute overall link success probability
-    q_link_values = 0.5 * etha_c**2 * np.exp(-L_o / L_att)
-    
+
+def _rate_decent(q_BSM, q_Fuse, N, delta_t, q_link_values, k_max, method="fast"):
+    """Rate_Decent for given link success probabilities."""
     # Ensure q_link_values is array-like
     q_link_values = np.atleast_1d(q_link_values)
 
     # Initialize an array to store the expected time E[T] for each q_link
     E_Tmax = np.zeros(q_link_values.shape)
 
+    if method == "fast":
+        q_flat = q_link_values.ravel()
+        E_flat = E_Tmax.reshape(-1)
+        step = max(1, _CHUNK_ELEMENTS // k_max)
+        for start in range(0, q_flat.size, step):
+            F_n = _decent_link_cdf(q_BSM, q_flat[start:start + step], k_max) ** N
+            E_flat[start:start + step] = np.sum(1 - F_n, axis=0) * delta_t / q_Fuse**N
+    elif method == "reference":
+        _rate_decent_reference(q_BSM, q_Fuse, N, delta_t, q_link_values, k_max, E_Tmax)
+    else:
+        raise ValueError("method must be either 'fast' or 'reference'.")
+    
+    Rate_out = 1 / E_Tmax  # Inverse of average time gives the entanglement rate
+    
+    # If the output is a single value array, return a scalar
+    if Rate_out.size == 1:
+        return Rate_out.item()
+    return Rate_out
+
+
+@instrumented
+def _rate_decent_reference(q_BSM, q_Fuse, N, delta_t, q_link_values, k_max, E_Tmax):
+    """Original double-loop evaluation of Rate_Decent, writing E[T_max] into E_Tmax."""
+    count("inner_iterations", q_link_values.size * k_max * (k_max + 1) // 2)
     # Loop over each q_link value
     for idx, q_link in np.ndenumerate(q_link_values):
         
@@ -91,10 +323,59 @@ def Rate_Decent(q_BSM, q_Fuse, N, delta_t, L_0_in, k_max):
         # Multiply by the time step delta_t and account for fusion operations.
         # Each fusion step must succeed independently for all N fusions.
         E_Tmax[idx] = (E_n * delta_t) / (q_Fuse**N)
-    
-    Rate_out = 1 / E_Tmax  # Inverse of average time gives the entanglement rate
-    
-    # If the output is a single value array, return a scalar
+
+
+@instrumented
+def Rate_Decent_adaptive(q_BSM, q_Fuse, N, delta_t, L_0_in, rtol=1e-6, k_start=1024, k_limit=2 ** 22,
+                         link_model=None):
+    """
+    Rate_Decent_adaptive calculates the same rate as Rate_Decent, but instead
+    of a fixed k_max it extends the sum over time slots per q_link value until
+    a bound on the neglected tail is below rtol relative to the sum.
+
+    The CDF values already computed are reused when k is extended. The tail is
+    bounded through E[n_i] = E[n_BSM] * E[n_dist], which is known exactly:
+    sum_{k>K} (1 - F_n(k)) <= N * sum_{k>K} (1 - F_n_i(k))
+                           = N * (E[n_i] - sum_{k=0}^{K} (1 - F_n_i(k))).
+    Rate_err adds to it an allowance of (N + 1) * k_stop * eps relative for the
+    rounding of the running sums (see _truncation_error). The tail bound itself
+    cannot resolve remainders below that rounding, so rtol should stay well
+    above it, or every value runs to k_limit.
+
+    Parameters:
+      q_BSM    - Success probability of a Bell-state measurement (BSM)
+      q_Fuse   - Success probability of a fusion operation
+      N        - Number of qubits/nodes involved in GHZ entanglement
+      delta_t  - Time duration of a single attempt (time step in s)
+      L_0_in   - The final distance between neighboring nodes (in km)
+      rtol     - Requested relative error of the rate
+      k_start  - Number of time slots in the first pass
+      k_limit  - Largest number of time slots to consider
+      link_model - Links.LinkModel of the elementary links (default: DEFAULT_LINK_MODEL)
+
+    Returns:
+      Rate_out - Average entanglement distribution rate; equal to Rate_Decent
+                 with k_max = k_stop
+      Rate_err - Bound on |Rate_out minus the untruncated rate|, tail and rounding
+      k_stop   - Number of time slots at which the sum was stopped
+    """
+    q_link_values = np.atleast_1d(resolve(link_model).q_link("decentralized", L_0_in))
+
+    def extend(state, q_link, k_lo, k_hi):
+        if k_lo == 0:
+            state["S_n_i"] = np.ones(q_link.size)   # sum_{k=0}^{k_lo} (1 - F_n_i(k))
+            state["S_n"] = np.zeros(q_link.size)    # sum_{k=1}^{k_lo} (1 - F_n(k))
+            state["E_n_i"] = _expected_max_geometric(2, q_link) / q_BSM
+        F_n_i = _extend_decent_link_cdf(state, q_BSM, q_link, k_lo, k_hi)
+        state["S_n_i"] += np.sum(1 - F_n_i, axis=0)
+        state["S_n"] += np.sum(1 - F_n_i**N, axis=0)
+        return state["S_n"], N * np.maximum(state["E_n_i"] - state["S_n_i"], 0)
+
+    E_n, tail, k_stop = _adaptive_tail_sum(extend, q_link_values, rtol, k_start, k_limit)
+    Rate_out = q_Fuse**N / (E_n * delta_t)
+    Rate_err = _truncation_error(Rate_out, E_n, tail, k_stop, N + 1)
+
+    Rate_out, Rate_err, k_stop = (a.reshape(q_link_values.shape) for a in (Rate_out, Rate_err, k_stop))
     if Rate_out.size == 1:
-        return Rate_out.item()
-    return Rate_out
+        return Rate_out.item(), Rate_err.item(), k_stop.item()
+    return Rate_out, Rate_err, k_stop
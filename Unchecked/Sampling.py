@@ -0,0 +1,75 @@
+"""
+Adaptive sampling of model curves for plotting.
+
+The rate and fidelity curves are smooth almost everywhere and only bend sharply near small
+distances or q_link close to 0, so an even grid of 100,000 points spends nearly all of its
+evaluations where a straight line would do. `adaptive_sample` starts from a coarse grid and
+halves only the intervals whose midpoint is off the straight line between the endpoints by
+more than the plotting tolerance. All midpoints of a pass are evaluated in one vectorized call.
+
+    L_0_in, (F_target,) = adaptive_sample(lambda L: factory_fidelity(3, L, 1e-2, 0, 0, 1), 1e-3, 500)
+"""
+import numpy as np
+
+
+def adaptive_sample(func, lo, hi, tol=1e-3, initial=33, scale="linear", max_points=100000):
+    """Sample func on [lo, hi] until linear interpolation is within tol of every tested midpoint.
+
+    Parameters
+    ----------
+    func : callable
+        Vectorized function of a 1-D array x. It returns an array of shape (len(x),) or
+        (num_curves, len(x)) to sample several curves on the same points.
+    lo, hi : float
+        Interval to sample (lo > 0 if scale is "log").
+    tol : float
+        Tolerance relative to the range of every curve, e.g. 1e-3 is a tenth of a percent
+        of the plot height.
+    initial : int
+        Number of points of the initial even grid; features narrower than its spacing may be missed.
+    scale : str
+        "linear" or "log": whether intervals are halved in x or in log(x).
+    max_points : int
+        Stop subdividing once this many points are sampled.
+
+    Returns
+    -------
+    x : numpy.ndarray
+        Increasing sample points.
+    y : numpy.ndarray
+        Array of shape (num_curves, len(x)) of the curve values.
+
+    """
+    if scale == "log":
+        forward, inverse = np.log, np.exp
+    elif scale == "linear":
+        forward, inverse = (lambda x: x), (lambda s: s)
+    else:
+        raise ValueError("scale must be either 'linear' or 'log'.")
+
+    s = np.linspace(forward(lo), forward(hi), initial)
+    x = inverse(s)
+    x[[0, -1]] = lo, hi  # exact endpoints despite the round trip through log
+    y = np.atleast_2d(np.asarray(func(x), dtype=float))
+    pending = np.ones(s.size - 1, dtype=bool)  # intervals whose midpoint is still to be tested
+    while pending.any() and s.size < max_points:
+        index = np.flatnonzero(pending)
+        s_mid = (s[index] + s[index + 1]) / 2
+        y_mid = np.atleast_2d(np.asarray(func(inverse(s_mid)), dtype=float))
+
+        finite = np.where(np.isfinite(y), y, np.nan)
+        height = np.nanmax(finite, axis=1, keepdims=True) - np.nanmin(finite, axis=1, keepdims=True)
+        height = np.where(height > 0, height, 1)
+        error = np.max(np.abs(y_mid - (y[:, index] + y[:, index + 1]) / 2) / height, axis=0)
+
+        # Every midpoint is kept; only the halves of intervals that failed the test are tested again
+        split = np.zeros(pending.size, dtype=bool)
+        split[index] = error > tol
+        halves = np.ones(pending.size, dtype=int)
+        halves[index] = 2
+        pending = np.repeat(split, halves)
+        s = np.insert(s, index + 1, s_mid)
+        y = np.insert(y, index + 1, y_mid, axis=1)
+    x = inverse(s)
+    x[[0, -1]] = lo, hi
+    return x, y
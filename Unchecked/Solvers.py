@@ -0,0 +1,194 @@
+"""
+Root finding on the model functions, instead of reading crossings off dense np.linspace plots.
+
+Each solver first scans the interval with a few tens of points in one vectorized model call
+to bracket the crossing, then refines the bracket with Brent's method (scipy.optimize.brentq,
+imported on first use) or plain bisection. An answer thus costs tens of model evaluations.
+Where the analytic derivative is available (see Gradients.py), method="newton" refines with
+Newton steps kept inside the bracket, which converge in a few model evaluations.
+
+- `crossover_distance`: the L_0_in beyond which the decentralized switch (Rate_Decent)
+  outperforms the centralized one (Rate_Factory).
+- `threshold_distance`: the largest L_0_in at which a fidelity stays at or above a target,
+  for the GHZ factory or the 2D network of Plot_F.py.
+- `level_breakeven_N`: the smallest N at which adding a 2D repeater level no longer raises
+  the rate (a search over the integers).
+
+The scan finds crossings that are at least one scan step apart; increase num_scan for
+curves that cross the level several times in a short interval.
+"""
+import numpy as np
+from .Gradients import Rate_Decent_grad, Rate_Factory_grad, factory_fidelity_grad
+from .Joint import twod_fidelity
+from .Leading_F import factory_fidelity
+from .Rate_2D_func import Rate_2D_adaptive
+from .Rate_func import Rate_Decent_adaptive, Rate_Factory
+
+
+def _refine(func, lo, hi, xtol, method, fprime=None):
+    """Root of the scalar function func in [lo, hi], where func changes sign.
+
+    method="newton" needs the derivative fprime; a step that leaves the bracket, which
+    shrinks around the root at every evaluation, is replaced by a bisection step.
+    """
+    if method == "newton":
+        if fprime is None:
+            raise ValueError("method 'newton' needs the derivative fprime.")
+        lo_positive = func(lo) > 0
+        x = (lo + hi) / 2
+        while hi - lo > xtol:
+            f_x = func(x)
+            if f_x == 0:
+                return x
+            if (f_x > 0) == lo_positive:
+                lo = x
+            else:
+                hi = x
+            step = f_x / fprime(x)
+            x_new = x - step if np.isfinite(step) and lo < x - step < hi else (lo + hi) / 2
+            if abs(x_new - x) <= xtol:
+                return x_new
+            x = x_new
+        return x
+    if method == "brent":
+        from scipy.optimize import brentq
+        return brentq(func, lo, hi, xtol=xtol)
+    if method != "bisect":
+        raise ValueError("method must be one of 'brent', 'bisect' or 'newton'.")
+    f_lo = func(lo)
+    while hi - lo > xtol:
+        mid = (lo + hi) / 2
+        f_mid = func(mid)
+        if (f_mid > 0) == (f_lo > 0):
+            lo, f_lo = mid, f_mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def _scan(func, L_min, L_max, num_scan):
+    """Distances spaced geometrically over [L_min, L_max], where the models vary fastest at the small end."""
+    L = np.geomspace(L_min, L_max, num_scan)
+    return L, np.asarray(func(L), dtype=float)
+
+
+def crossover_distance(q_BSM, q_Fuse, N, L_min=1e-3, L_max=500, num_scan=16, xtol=1e-6, rtol=1e-9,
+                       method="brent"):
+    """First distance at which Rate_Decent and Rate_Factory are equal.
+
+    The rates are compared through log(Rate_Decent / Rate_Factory), so delta_t drops out.
+    Rate_Decent is evaluated with Rate_Decent_adaptive, whose bounded truncation keeps the
+    difference smooth in L_0_in.
+
+    Parameters
+    ----------
+    q_BSM, q_Fuse, N
+        As in Rate_Decent.
+    L_min, L_max : float
+        Interval of distances L_0_in (in km) to search.
+    num_scan : int
+        Number of points of the bracketing scan.
+    xtol : float
+        Absolute tolerance of the returned distance (in km).
+    rtol : float
+        Relative tolerance passed to Rate_Decent_adaptive.
+    method : str
+        "brent" (default), "bisect" or "newton". Newton steps use Rate_Decent_grad and
+        Rate_Factory_grad, with k_max the number of time slots Rate_Decent_adaptive needs
+        at the far end of the bracket.
+
+    Returns
+    -------
+    L_cross : float
+        The crossover distance in km, or nan if the rates do not cross in [L_min, L_max].
+
+    """
+    def log_ratio(L):
+        return np.log(Rate_Decent_adaptive(q_BSM, q_Fuse, N, 1, L, rtol=rtol)[0] / Rate_Factory(q_BSM, N, 1, L))
+
+    L, values = _scan(log_ratio, L_min, L_max, num_scan)
+    changes = np.flatnonzero(np.signbit(values[:-1]) != np.signbit(values[1:]))
+    if changes.size == 0:
+        return np.nan
+    index = changes[0]
+    fprime = None
+    if method == "newton":
+        k_max = int(np.max(Rate_Decent_adaptive(q_BSM, q_Fuse, N, 1, L[index:index + 2], rtol=rtol)[2]))
+
+        def log_ratio(L):
+            return np.log(Rate_Decent_grad(q_BSM, q_Fuse, N, 1, L, k_max)["rate"] / Rate_Factory(q_BSM, N, 1, L))
+
+        def fprime(L):
+            decent, factory = Rate_Decent_grad(q_BSM, q_Fuse, N, 1, L, k_max), Rate_Factory_grad(q_BSM, N, 1, L)
+            return decent["d_L_0_in"] / decent["rate"] - factory["d_L_0_in"] / factory["rate"]
+    return _refine(lambda x: float(log_ratio(x)), L[index], L[index + 1], xtol, method, fprime)
+
+
+def threshold_distance(func, target, L_min=1e-3, L_max=500, num_scan=32, xtol=1e-6, method="brent",
+                       fprime=None):
+    """Largest distance in [L_min, L_max] at which func(L_0_in) >= target.
+
+    func must accept an array of distances. Returns L_max if func stays at or above target
+    at L_max, and nan if no scanned distance reaches the target. method="newton" needs
+    fprime, the derivative of func in L_0_in.
+    """
+    L, values = _scan(func, L_min, L_max, num_scan)
+    above = np.flatnonzero(values >= target)
+    if above.size == 0:
+        return np.nan
+    index = above[-1]
+    if index == L.size - 1:
+        return L_max
+    derivative = None if fprime is None else lambda x: float(np.asarray(fprime(x)))
+    return _refine(lambda x: float(np.asarray(func(x))) - target, L[index], L[index + 1], xtol, method, derivative)
+
+
+def fidelity_distance(F_target, N, network="2D", q_BSM=0.98, mem_depolar_prob=1e-2, link_depolar_prob=0,
+                      bsm_depolar_prob=0, ghz_fidelity=1, **kwargs):
+    """Largest L_0_in (in km) at which the fidelity stays at or above F_target.
+
+    network is "factory" for factory_fidelity, or "2D" for the fidelity of the 2D network
+    built on GHZ-factory parents (as in Plot_F.py). The remaining keyword arguments are passed
+    to `threshold_distance`; method="newton" is supported for the factory network.
+    """
+    if network == "factory":
+        func = lambda L: factory_fidelity(N, L, mem_depolar_prob, link_depolar_prob, bsm_depolar_prob,
+                                          ghz_fidelity)
+        kwargs.setdefault("fprime", lambda L: factory_fidelity_grad(N, L, mem_depolar_prob, link_depolar_prob,
+                                                                      bsm_depolar_prob, ghz_fidelity)["d_L_0_in"])
+    elif network == "2D":
+        func = lambda L: twod_fidelity(N, L, q_BSM, mem_depolar_prob, link_depolar_prob, bsm_depolar_prob,
+                                       ghz_fidelity)
+    else:
+        raise ValueError("network must be either 'factory' or '2D'.")
+    return threshold_distance(func, F_target, **kwargs)
+
+
+def level_breakeven_N(L_0_in, m=1, t="Centralized", q_BSM=0.98, q_Fuse=0.98, N_min=3, N_max=20, rtol=1e-6):
+    """Smallest N at which m + 1 levels of the 2D repeater no longer beat m levels.
+
+    The gain log(Rate_2D(m + 1) / Rate_2D(m)) is assumed to decrease with N, so the
+    search bisects over the integers in [N_min, N_max] with O(log(N_max - N_min))
+    evaluations of Rate_2D_adaptive.
+
+    Returns
+    -------
+    N : int or None
+        The break-even N, or None if the extra level still pays off at N_max.
+
+    """
+    def pays_off(N):
+        lower = Rate_2D_adaptive(q_BSM, q_Fuse, N, 1, L_0_in, m, t, rtol=rtol)[0]
+        upper = Rate_2D_adaptive(q_BSM, q_Fuse, N, 1, L_0_in, m + 1, t, rtol=rtol)[0]
+        return upper > lower
+
+    if pays_off(N_max):
+        return None
+    lo, hi = N_min - 1, N_max  # the extra level pays off at lo (vacuously) and not at hi
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if pays_off(mid):
+            lo = mid
+        else:
+            hi = mid
+    return hi
@@ -0,0 +1,192 @@
+"""
+Parallel, resumable parameter sweeps over the rate and fidelity models.
+
+A sweep is described by a grid: a dict mapping parameter names to lists of
+values, plus the distance array `L_0_in` that every model evaluates in one
+vectorized call. For example
+
+    grid = {
+        "model": ["Rate_Factory", "Rate_Decent", "Rate_2D"],
+        "N": [3, 4, 5],
+        "m": [1, 2],
+        "t": ["Centralized", "Decentralized"],
+        "q_BSM": [0.9, 0.98],
+        "L_0_in": np.linspace(1e-3, 150, 1000),
+    }
+    run_sweep(grid, "sweep_out")
+
+Each model only expands the parameters it takes, so e.g. `m` does not
+multiply the Rate_Factory points. Parameters not in the grid take the values
+in DEFAULTS. The points are split into chunks and the chunks are evaluated
+on a process pool. Each finished chunk is written as soon as it arrives, to
+`chunk_<i>.npz` in the output directory. Rerunning the same grid on the same
+directory skips the chunks already on disk, so a killed sweep resumes where
+it stopped. At the end all chunks are merged into `results.npz`. It holds
+one column per parameter plus `L_0_in` and `value`, with one row per
+(point, distance) pair.
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+import numpy as np
+from .Joint import twod_fidelity
+from .Leading_F import factory_fidelity
+from .Rate_2D_func import Rate_2D
+from .Rate_func import Rate_Decent, Rate_Factory
+
+# Values used for parameters that a grid does not specify
+DEFAULTS = {
+    "N": 3,
+    "m": 1,
+    "t": "Centralized",
+    "q_BSM": 0.98,
+    "q_Fuse": 0.98,
+    "delta_t": 1,
+    "k_max": 2000,
+    "mem_depolar_prob": 1e-2,
+    "link_depolar_prob": 0,
+    "bsm_depolar_prob": 0,
+    "ghz_fidelity": 1,
+}
+
+
+# Model name -> (function called with keyword arguments, parameters it takes besides L_0_in)
+MODELS = {
+    "Rate_Factory": (
+        lambda N, q_BSM, delta_t, L_0_in: Rate_Factory(q_BSM, N, delta_t, L_0_in),
+        ("N", "q_BSM", "delta_t")),
+    "Rate_Decent": (
+        lambda N, q_BSM, q_Fuse, delta_t, k_max, L_0_in: Rate_Decent(q_BSM, q_Fuse, N, delta_t, L_0_in, k_max),
+        ("N", "q_BSM", "q_Fuse", "delta_t", "k_max")),
+    "Rate_2D": (
+        lambda N, m, t, q_BSM, q_Fuse, delta_t, k_max, L_0_in: Rate_2D(q_BSM, q_Fuse, N, delta_t, L_0_in, m,
+                                                                       k_max, t),
+        ("N", "m", "t", "q_BSM", "q_Fuse", "delta_t", "k_max")),
+    "factory_fidelity": (
+        lambda N, mem_depolar_prob, link_depolar_prob, bsm_depolar_prob, ghz_fidelity, L_0_in: factory_fidelity(
+            N, L_0_in, mem_depolar_prob, link_depolar_prob, bsm_depolar_prob, ghz_fidelity),
+        ("N", "mem_depolar_prob", "link_depolar_prob", "bsm_depolar_prob", "ghz_fidelity")),
+    "TwoD_network_fidelity": (
+        lambda N, q_BSM, mem_depolar_prob, link_depolar_prob, bsm_depolar_prob, ghz_fidelity, L_0_in: twod_fidelity(
+            N, L_0_in, q_BSM, mem_depolar_prob, link_depolar_prob, bsm_depolar_prob, ghz_fidelity),
+        ("N", "q_BSM", "mem_depolar_prob", "link_depolar_prob", "bsm_depolar_prob", "ghz_fidelity")),
+}
+
+# Parameters stored as text columns; all others are stored as floats
+_TEXT_PARAMS = ("model", "t")
+
+
+def expand_grid(grid):
+    """List of parameter dicts, one per model evaluation, for a grid (without L_0_in)."""
+    unknown = set(grid) - set(DEFAULTS) - {"model", "L_0_in"}
+    if unknown:
+        raise ValueError(f"Unknown grid parameters: {sorted(unknown)}.")
+    points = []
+    for model in grid.get("model", list(MODELS)):
+        if model not in MODELS:
+            raise ValueError(f"Unknown model {model!r}. Use one of {sorted(MODELS)}.")
+        names = MODELS[model][1]
+        values = [grid.get(name, [DEFAULTS[name]]) for name in names]
+        for combination in product(*values):
+            points.append({"model": model, **dict(zip(names, combination))})
+    return points
+
+
+def _evaluate_chunk(points, L_0_in):
+    """Evaluate a chunk of points over L_0_in and return the columns of its rows."""
+    columns = {name: [] for name in ("model", *DEFAULTS, "L_0_in", "value")}
+    for point in points:
+        func, names = MODELS[point["model"]]
+        value = np.broadcast_to(func(L_0_in=L_0_in, **{name: point[name] for name in names}), L_0_in.shape)
+        for name in ("model", *DEFAULTS):
+            if name in _TEXT_PARAMS:
+                columns[name].append(np.full(L_0_in.size, point.get(name, "")))
+            else:
+                columns[name].append(np.full(L_0_in.size, point.get(name, np.nan), dtype=float))
+        columns["L_0_in"].append(L_0_in)
+        columns["value"].append(value)
+    return {name: np.concatenate(parts) for name, parts in columns.items()}
+
+
+def _grid_digest(grid):
+    """Hash identifying a grid, used to refuse resuming into a directory of a different sweep."""
+    canonical = {name: np.asarray(values).tolist() for name, values in sorted(grid.items())}
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+def _save_npz(path, columns):
+    """Write columns to path atomically, so a killed sweep never leaves a truncated chunk."""
+    # Through a file handle, np.savez keeps the name, which then never matches a chunk file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as tmp_file:
+        np.savez(tmp_file, **columns)
+    os.replace(tmp_path, path)
+
+
+def run_sweep(grid, out_dir, max_workers=None, chunk_size=8):
+    """Evaluate a parameter grid on a process pool, checkpointing each chunk to out_dir.
+
+    Parameters
+    ----------
+    grid : dict
+        Parameter name -> list of values; "model" lists the model names in MODELS and
+        "L_0_in" is the array of distances (in km) passed to every model at once.
+    out_dir : str
+        Directory for the chunk files, the manifest and the merged `results.npz`.
+    max_workers : int or None
+        Size of the process pool (None uses all cores, 0 evaluates in this process).
+    chunk_size : int
+        Number of parameter points per chunk.
+
+    Returns
+    -------
+    results : dict of numpy.ndarray
+        The merged columns, as stored in `results.npz`.
+
+    """
+    L_0_in = np.atleast_1d(np.asarray(grid["L_0_in"], dtype=float))
+    points = expand_grid(grid)
+    chunks = [points[start:start + chunk_size] for start in range(0, len(points), chunk_size)]
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    digest = _grid_digest(grid)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest["grid"] != digest or manifest["chunk_size"] != chunk_size:
+            raise ValueError(f"{out_dir} holds a different sweep; use a new output directory.")
+    else:
+        with open(manifest_path, "w") as manifest_file:
+            json.dump({"grid": digest, "chunk_size": chunk_size, "num_chunks": len(chunks)}, manifest_file)
+
+    chunk_paths = [os.path.join(out_dir, f"chunk_{index:05d}.npz") for index in range(len(chunks))]
+    todo = [index for index, path in enumerate(chunk_paths) if not os.path.exists(path)]
+    if max_workers == 0:
+        for index in todo:
+            _save_npz(chunk_paths[index], _evaluate_chunk(chunks[index], L_0_in))
+    elif todo:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_evaluate_chunk, chunks[index], L_0_in): index for index in todo}
+            for future in as_completed(futures):
+                _save_npz(chunk_paths[futures[future]], future.result())
+
+    results = load_chunks(out_dir)
+    _save_npz(os.path.join(out_dir, "results.npz"), results)
+    return results
+
+
+def load_chunks(out_dir):
+    """Merge the chunk files of a (possibly unfinished) sweep into one set of columns."""
+    paths = sorted(name for name in os.listdir(out_dir) if re.fullmatch(r"chunk_\d+\.npz", name))
+    parts = []
+    for name in paths:
+        with np.load(os.path.join(out_dir, name)) as data:
+            parts.append({key: data[key] for key in data.files})
+    if not parts:
+        return {}
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
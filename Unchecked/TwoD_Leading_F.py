@@ -5,10 +5,17 @@ Mohadeseh Azari / Department of Informatics and Networked Systems /
 School of Computing and Information / University of Pittsburgh / 
 Pittsburgh,PA / moa125@pitt.edu'
 """
-from Leading_F import fidelity_to_depolarizing_prob, _check_set
+from .Leading_F import fidelity_to_depolarizing_prob, _check_set, _g_subset_sums
+import functools
 import itertools
+import math
+import numpy as np
+from .Instrument import instrumented, lru_call
 
+MODEL_VERSION = 1
 
+
+@instrumented
 def _g_function(num_remote_nodes, GHZ_success_prob, subset, prob):
     """This _g_function is the same as Leading-order expression for the function G in Appendix D of the paper
     "Analysis of Multipartite Entanglement Distribution using a Central Quantum-Network Node"
@@ -36,6 +43,7 @@ def _g_function(num_remote_nodes, GHZ_success_prob, subset, prob):
     return value
 
 
+@instrumented
 def G_function(num_remote_nodes, set_all_integers, GHZ_success_prob, prob, link_bsm_depolar):
     """This G_function is defined in the notes.
 
@@ -74,7 +82,49 @@ def G_function(num_remote_nodes, set_all_integers, GHZ_success_prob, prob, link_
     return fidelity
 
 
-def TwoD_network_fidelity(num_remote_nodes, GHZ_success_prob, mem_depolar_prob, bsm_depolar_prob, ghz_fidelity):
+@functools.lru_cache(maxsize=64)
+def _level_prefactors(num_remote_nodes):
+    """Prefactors P[n, i] of `G_function`: level n is sum_i P[n, i] * link_bsm_depolar ** i * (G summed over size i)."""
+    prefactors = np.zeros((num_remote_nodes + 1, num_remote_nodes + 1))
+    for n in range(1, num_remote_nodes + 1):
+        for i in range(n + 1):
+            i_even = i % 2 == 0
+            if not i_even and i != n:
+                continue
+            prefactors[n, i] = (1 / 2) ** n if i_even else 0
+            if i == n:
+                prefactors[n, i] += 1 / 2
+    prefactors.flags.writeable = False
+    return prefactors
+
+
+@instrumented
+def _G_levels(num_remote_nodes, GHZ_success_prob, prob, link_bsm_depolar):
+    """`G_function` for every level i = 0, 1, ..., num_remote_nodes at once.
+
+    Level i is `G_function(i, {1, ..., i}, ...)`, evaluated once through `_g_subset_sums` instead of
+    by enumerating subsets; level 0 is 1, the value `TwoD_network_fidelity` uses for i == 0.
+    Broadcasts over array-valued `GHZ_success_prob`, `prob` and `link_bsm_depolar`. Only the
+    prefactors, which depend on num_remote_nodes alone, are memoized; everything that depends
+    on the arrays is applied after the lookup, so the memo stays a few small tables.
+    """
+    GHZ_success_prob = np.asarray(GHZ_success_prob, dtype=float)
+    shape = np.broadcast(GHZ_success_prob, prob, link_bsm_depolar).shape
+    prefactors = lru_call(_level_prefactors, num_remote_nodes)
+    levels = np.empty((num_remote_nodes + 1,) + shape)
+    levels[0] = 1
+    for n in range(1, num_remote_nodes + 1):
+        gs_by_size = _g_subset_sums(n, GHZ_success_prob, prob)
+        value = 0
+        for i in np.flatnonzero(prefactors[n]):
+            value = value + prefactors[n, i] * link_bsm_depolar ** i * gs_by_size[i]
+        levels[n] = value
+    return levels
+
+
+@instrumented
+def TwoD_network_fidelity(num_remote_nodes, GHZ_success_prob, mem_depolar_prob, bsm_depolar_prob, ghz_fidelity,
+                          method="fast"):
     """Analytical results for the fidelity achieved with the 2D repeater protocol (leading-order expression).
 
     The leading-order expression is to leading order in the link success probability (`link_success_prob`)
@@ -94,6 +144,10 @@ def TwoD_network_fidelity(num_remote_nodes, GHZ_success_prob, mem_depolar_prob,
         Depolarizing noise in quantum memory per time step for both the GHZ factory and end nodes.
     bsm_depolar_prob : float
         Depolarizing probability on each qubit participating in a Bell-state measurement.
+    method : str (optional)
+        "fast" (default) evaluates every level of `G_function` once and weighs it by the number of subsets
+        of that size. `GHZ_success_prob` and `ghz_fidelity` may then be arrays, e.g. over distance.
+        "reference" calls `G_function` once per subset.
 
     """
 
@@ -101,6 +155,15 @@ def TwoD_network_fidelity(num_remote_nodes, GHZ_success_prob, mem_depolar_prob,
     ghz_depolarizing_prob = fidelity_to_depolarizing_prob(num_qubits=num_remote_nodes, fidelity=ghz_fidelity)
     link_bsm_depolar = (1 - bsm_depolar_prob) ** (num_remote_nodes - 1)
     prob = 1 - (1 - mem_depolar_prob) ** (num_remote_nodes)
+    if method == "fast":
+        levels = _G_levels(num_remote_nodes, GHZ_success_prob, prob, link_bsm_depolar)
+        fidelity = 0
+        for i in range(num_remote_nodes + 1):
+            fidelity = fidelity + math.comb(num_remote_nodes, i) * levels[i] * \
+                ((1/2 - ghz_depolarizing_prob/2) ** (num_remote_nodes - i)) * (ghz_depolarizing_prob ** i)
+        return fidelity
+    if method != "reference":
+        raise ValueError("method must be either 'fast' or 'reference'.")
     set_all_integers = set(range(1, num_remote_nodes + 1))
 
     fidelity = 0
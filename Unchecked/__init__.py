@@ -0,0 +1,18 @@
+"""
+Rate and fidelity models of GHZ-state distribution with centralized, decentralized
+and 2D repeater switches.
+
+Importing the package only defines functions: nothing is computed, and matplotlib is
+imported by the plotting functions when they are called. Run
+
+    python -m Unchecked --help
+
+to evaluate a model from the command line (see __main__.py).
+"""
+from .Leading_F import factory_fidelity
+from .Rate_2D_func import Rate_2D, Rate_2D_adaptive
+from .Rate_func import Rate_Decent, Rate_Decent_adaptive, Rate_Factory
+from .TwoD_Leading_F import TwoD_network_fidelity
+
+__all__ = ["Rate_Factory", "Rate_Decent", "Rate_Decent_adaptive", "Rate_2D", "Rate_2D_adaptive",
+           "factory_fidelity", "TwoD_network_fidelity"]
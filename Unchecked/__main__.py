@@ -0,0 +1,81 @@
+"""
+Command-line evaluation of one model over a range of distances.
+
+    python -m Unchecked Rate_Decent --set N=4 --set k_max=5000 --L_0_in 1e-3 150 1000 --out rates.npz
+    python -m Unchecked TwoD_network_fidelity --set N=3 --L_0_in 1e-3 500 200 --out fidelity.csv
+    python -m Unchecked --list
+
+The models and their parameters are those of Sweep.MODELS; parameters that are not set
+take the values in Sweep.DEFAULTS. A .npz output holds the arrays `L_0_in` and `value`
+plus one entry per parameter, and any other output is written as two CSV columns.
+"""
+import argparse
+import sys
+
+import numpy as np
+from .Sweep import DEFAULTS, MODELS
+
+
+def _parse_value(text):
+    """Read a parameter value given on the command line as an int, a float or else a string."""
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _parse_assignment(text):
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+    return name, _parse_value(value)
+
+
+def evaluate(model, L_0_in, **params):
+    """Evaluate a model of Sweep.MODELS over L_0_in, with DEFAULTS for the parameters not given."""
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}. Use one of {sorted(MODELS)}.")
+    func, names = MODELS[model]
+    unknown = set(params) - set(names)
+    if unknown:
+        raise ValueError(f"{model} does not take the parameters {sorted(unknown)}; it takes {list(names)}.")
+    values = {name: params.get(name, DEFAULTS[name]) for name in names}
+    return values, np.broadcast_to(func(L_0_in=L_0_in, **values), L_0_in.shape)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m Unchecked", description=__doc__.splitlines()[1])
+    parser.add_argument("model", nargs="?", choices=sorted(MODELS), help="model to evaluate")
+    parser.add_argument("--set", dest="params", action="append", type=_parse_assignment, default=[],
+                        metavar="NAME=VALUE", help="model parameter (repeatable)")
+    parser.add_argument("--L_0_in", nargs=3, type=float, default=(1e-3, 150, 1000), metavar=("START", "STOP", "NUM"),
+                        help="evenly spaced distances in km (default: 1e-3 150 1000)")
+    parser.add_argument("--out", default="-", help="output .npz or .csv file (default: CSV on stdout)")
+    parser.add_argument("--list", action="store_true", help="list the models and their parameters")
+    args = parser.parse_args(argv)
+
+    if args.list or args.model is None:
+        for name, (_, names) in MODELS.items():
+            print(f"{name}: " + ", ".join(f"{param}={DEFAULTS[param]}" for param in names))
+        return 0
+
+    start, stop, num = args.L_0_in
+    L_0_in = np.linspace(start, stop, int(num))
+    try:
+        values, value = evaluate(args.model, L_0_in, **dict(args.params))
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.out.endswith(".npz"):
+        np.savez(args.out, L_0_in=L_0_in, value=value, **values)
+    else:
+        header = f"{args.model} " + " ".join(f"{name}={param}" for name, param in values.items()) + "\nL_0_in,value"
+        np.savetxt(sys.stdout if args.out == "-" else args.out, np.column_stack([L_0_in, value]), delimiter=",",
+                   header=header, fmt="%.17g")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
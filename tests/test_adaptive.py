@@ -0,0 +1,84 @@
+import functools
+
+import numpy as np
+import pytest
+
+from Unchecked.Links import DEFAULT_LINK_MODEL
+from Unchecked.Rate_2D_func import Rate_2D, Rate_2D_adaptive, link_gen_prob
+from Unchecked.Rate_func import Rate_Decent, Rate_Decent_adaptive
+
+# Number of time slots of the long-double references, far beyond where the tails matter
+K_REFERENCE = 6000
+
+DISTANCES = np.array([0.5, 10.0, 30.0])
+
+
+def _mixture_cdf(success_prob, base_cdf):
+    """F(k) = sum_u P(u) B(floor(k/u)) in long double, by the plain loop over u."""
+    success_prob = np.longdouble(success_prob)
+    k = np.arange(1, base_cdf.shape[0] + 1)
+    base = np.concatenate([np.zeros((1,) + base_cdf.shape[1:], dtype=np.longdouble), base_cdf])
+    F = np.zeros_like(base_cdf)
+    weight = success_prob
+    for u in k:
+        F += weight * base[k // u]
+        weight *= 1 - success_prob
+    return F
+
+
+def _link_cdf(q_link, exponent):
+    """[1 - (1 - q_link)^k]^exponent for k = 1..K_REFERENCE in long double."""
+    k = np.arange(1, K_REFERENCE + 1, dtype=np.longdouble)[:, None]
+    return (1 - (1 - np.asarray(q_link, dtype=np.longdouble)) ** k) ** exponent
+
+
+@functools.lru_cache
+def _reference_rate_decent(q_BSM, q_Fuse, N):
+    F_n_i = _mixture_cdf(q_BSM, _link_cdf(DEFAULT_LINK_MODEL.q_link("decentralized", DISTANCES), 2))
+    return np.longdouble(q_Fuse) ** N / np.sum(1 - F_n_i**N, axis=0)
+
+
+@functools.lru_cache
+def _reference_rate_2d(q_BSM, q_Fuse, N, m, t):
+    q_link = link_gen_prob(t, DISTANCES, m, N)
+    if t == "Centralized":
+        F_T = _mixture_cdf(np.longdouble(q_BSM) ** N, _link_cdf(q_link, N)) ** N
+    else:
+        F_n_i = _mixture_cdf(q_BSM, _link_cdf(q_link, 2))
+        F_T = _mixture_cdf(np.longdouble(q_Fuse) ** N, F_n_i**N) ** N
+    for _ in range(m - 1):
+        F_T = _mixture_cdf(np.longdouble(q_BSM) ** (N * (N - 1) // 2), F_T) ** N
+    return np.longdouble(q_BSM) ** (N * (N - 1) // 2) / np.sum(1 - F_T, axis=0)
+
+
+@pytest.mark.parametrize("rtol, k_start", [(1e-4, 4), (1e-8, 8), (1e-11, 64)])
+@pytest.mark.parametrize("q_BSM, N", [(0.9, 3), (0.7, 5)])
+def test_rate_decent_adaptive_error_bound(rtol, k_start, q_BSM, N):
+    rate, err, k_stop = Rate_Decent_adaptive(q_BSM, q_BSM, N, 1, DISTANCES, rtol=rtol, k_start=k_start)
+    reference = _reference_rate_decent(q_BSM, q_BSM, N)
+    assert np.all(k_stop <= K_REFERENCE / 4)
+    assert np.all(err > 0)
+    assert np.all(np.abs(rate - reference) <= err)
+    assert np.all(err <= 2 * rtol * rate + 1e-12 * rate)
+
+
+def test_rate_decent_adaptive_matches_rate_decent_at_k_stop():
+    rate, _, k_stop = Rate_Decent_adaptive(0.9, 0.9, 3, 1, 10.0, rtol=1e-8, k_start=8)
+    assert rate == pytest.approx(Rate_Decent(0.9, 0.9, 3, 1, 10.0, k_stop), rel=1e-13)
+
+
+@pytest.mark.parametrize("rtol, k_start", [(1e-4, 4), (1e-8, 8), (1e-11, 64)])
+@pytest.mark.parametrize("m, t", [(1, "Centralized"), (2, "Centralized"), (1, "Decentralized"),
+                                  (2, "Decentralized")])
+def test_rate_2d_adaptive_error_bound(rtol, k_start, m, t):
+    rate, err, k_stop = Rate_2D_adaptive(0.98, 0.98, 3, 1, DISTANCES, m, t, rtol=rtol, k_start=k_start)
+    reference = _reference_rate_2d(0.98, 0.98, 3, m, t)
+    assert np.all(k_stop <= K_REFERENCE / 4)
+    assert np.all(err > 0)
+    assert np.all(np.abs(rate - reference) <= err)
+    assert np.all(err <= 2 * rtol * rate + 1e-12 * rate)
+
+
+def test_rate_2d_adaptive_matches_rate_2d_at_k_stop():
+    rate, _, k_stop = Rate_2D_adaptive(0.9, 0.9, 3, 1, 10.0, 2, "Decentralized", rtol=1e-8, k_start=8)
+    assert rate == pytest.approx(Rate_2D(0.9, 0.9, 3, 1, 10.0, 2, k_stop, "Decentralized"), rel=1e-13)
@@ -0,0 +1,52 @@
+import json
+import os
+
+from Unchecked import Benchmark
+
+
+def _run(revision, seconds):
+    return {"revision": revision, "timings": [{"case": case, "axis": "N", "value": 3, "seconds": value}
+                                              for case, value in seconds.items()]}
+
+
+def test_find_regressions_against_the_latest_other_revision():
+    history = [_run("aaa", {"fast": 1.0, "slow": 1.0}), _run("bbb", {"fast": 2.0, "slow": 1.0})]
+    run = _run("ccc", {"fast": 2.4, "slow": 1.3, "new": 9.0})
+    regressions = Benchmark.find_regressions(run, history)
+    assert [(r["case"], r["baseline_revision"], r["slowdown"]) for r in regressions] == [("slow", "bbb", 1.3)]
+    # Earlier runs of the same revision are not baselines
+    assert Benchmark.find_regressions(run, history + [_run("ccc", {"fast": 0.1, "slow": 0.1})]) == regressions
+    assert Benchmark.find_regressions(run, [_run("ccc", {"slow": 0.1})]) == []
+    assert Benchmark.find_regressions(run, history, threshold=1.5) == []
+
+
+def test_load_history(tmp_path):
+    path = tmp_path / "history.jsonl"
+    assert Benchmark.load_history(str(path)) == []
+    runs = [_run("aaa", {"fast": 1.0}), _run("bbb", {"fast": 2.0})]
+    path.write_text("".join(json.dumps(run) + "\n" for run in runs) + "\n")
+    assert Benchmark.load_history(str(path)) == runs
+
+
+def test_default_history_path_is_outside_the_package(monkeypatch, tmp_path):
+    monkeypatch.delenv("CVD_BENCHMARK_HISTORY", raising=False)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    path = Benchmark.default_history_path()
+    assert path == os.path.join(str(tmp_path), "Centralized_VS_Decentralized", "benchmark_history.jsonl")
+    monkeypatch.setenv("CVD_BENCHMARK_HISTORY", str(tmp_path / "bench.jsonl"))
+    assert Benchmark.default_history_path() == str(tmp_path / "bench.jsonl")
+
+
+def test_main_appends_runs_and_flags_regressions(monkeypatch, tmp_path):
+    path = tmp_path / "data" / "history.jsonl"
+    monkeypatch.setenv("CVD_BENCHMARK_HISTORY", str(path))
+    monkeypatch.setattr(Benchmark, "_git_revision", lambda: "old")
+    assert Benchmark.main(["--quick", "--cases", "Rate_Factory[N]", "--repeat", "1"]) == 0
+    # Pretend the baseline was a thousand times faster
+    old_run = Benchmark.load_history(str(path))[0]
+    for timing in old_run["timings"]:
+        timing["seconds"] /= 1000
+    path.write_text(json.dumps(old_run) + "\n")
+    monkeypatch.setattr(Benchmark, "_git_revision", lambda: "new")
+    assert Benchmark.main(["--quick", "--cases", "Rate_Factory[N]", "--repeat", "1"]) == 1
+    assert [run["revision"] for run in Benchmark.load_history(str(path))] == ["old", "new"]
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from Unchecked import Links, Rate_func
+from Unchecked.Cache import CurveCache
+from Unchecked.Links import LinkModel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DISTANCES = np.array([1.0, 20.0, 80.0])
+
+
+def test_import_creates_no_cache_directory(tmp_path):
+    directory = tmp_path / "cache"
+    subprocess.run([sys.executable, "-c", "import Unchecked.Cache"], check=True, cwd=ROOT,
+                   env={**os.environ, "CVD_CACHE_DIR": str(directory)})
+    assert not directory.exists()
+
+
+def test_directory_is_created_on_first_write(tmp_path):
+    cache = CurveCache(str(tmp_path / "cache"))
+    rate_factory = cache.cached(Rate_func.Rate_Factory)
+    assert not (tmp_path / "cache").exists()
+    cache.clear()
+    rate_factory(0.98, 3, 1, DISTANCES)
+    assert any(name.endswith(".json") for name in os.listdir(tmp_path / "cache"))
+
+
+def test_results_are_served_from_memory_then_disk(tmp_path):
+    rate_factory = CurveCache(str(tmp_path)).cached(Rate_func.Rate_Factory)
+    expected = Rate_func.Rate_Factory(0.98, 3, 1, DISTANCES)
+    np.testing.assert_array_equal(rate_factory(0.98, 3, 1, DISTANCES), expected)
+    np.testing.assert_array_equal(rate_factory(0.98, 3, 1, DISTANCES), expected)
+    reopened = CurveCache(str(tmp_path)).cached(Rate_func.Rate_Factory)
+    np.testing.assert_array_equal(reopened(0.98, 3, 1, DISTANCES), expected)
+    assert rate_factory.cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 1}
+    assert reopened.cache.stats == {"memory_hits": 0, "disk_hits": 1, "misses": 0}
+
+
+def test_model_version_changes_the_key(monkeypatch):
+    cache = CurveCache()
+    before = cache.key(Rate_func.Rate_Factory, 0.98, 3, 1, DISTANCES)
+    monkeypatch.setattr(Rate_func, "MODEL_VERSION", Rate_func.MODEL_VERSION + 1)
+    assert cache.key(Rate_func.Rate_Factory, 0.98, 3, 1, DISTANCES) != before
+
+
+def test_link_model_parameters_change_the_key(monkeypatch):
+    cache = CurveCache()
+    before = cache.key(Rate_func.Rate_Factory, 0.98, 3, 1, DISTANCES)
+    assert cache.key(Rate_func.Rate_Factory, 0.98, 3, 1, DISTANCES, LinkModel(L_att=20)) != \
+        cache.key(Rate_func.Rate_Factory, 0.98, 3, 1, DISTANCES, LinkModel(L_att=22))
+    monkeypatch.setattr(Links.DEFAULT_LINK_MODEL, "L_att", 22)
+    assert cache.key(Rate_func.Rate_Factory, 0.98, 3, 1, DISTANCES) != before
+
+
+def test_links_model_version_changes_the_key(monkeypatch):
+    cache = CurveCache()
+    before = cache.key(Rate_func.Rate_Factory, 0.98, 3, 1, DISTANCES)
+    monkeypatch.setattr(Links, "MODEL_VERSION", Links.MODEL_VERSION + 1)
+    assert cache.key(Rate_func.Rate_Factory, 0.98, 3, 1, DISTANCES) != before
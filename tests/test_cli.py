@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from Unchecked.Rate_func import Rate_Decent
+from Unchecked.__main__ import evaluate, main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(*args):
+    return subprocess.run([sys.executable, *args], check=True, cwd=ROOT, capture_output=True, text=True).stdout
+
+
+def test_import_does_not_load_matplotlib_or_scipy():
+    code = ("import sys, Unchecked, Unchecked.__main__, Unchecked.Plot_F, Unchecked.Solvers; "
+            "print(sorted({name.split('.')[0] for name in sys.modules} & {'matplotlib', 'scipy'}))")
+    assert _run("-c", code).strip() == "[]"
+
+
+def test_module_writes_csv_to_stdout():
+    output = _run("-m", "Unchecked", "Rate_Decent", "--set", "N=4", "--set", "k_max=300", "--L_0_in", "1", "50", "5")
+    lines = output.splitlines()
+    assert lines[0] == "# Rate_Decent N=4 q_BSM=0.98 q_Fuse=0.98 delta_t=1 k_max=300"
+    assert lines[1] == "# L_0_in,value"
+    table = np.loadtxt(lines[2:], delimiter=",")
+    L_0_in = np.linspace(1, 50, 5)
+    np.testing.assert_array_equal(table[:, 0], L_0_in)
+    np.testing.assert_array_equal(table[:, 1], Rate_Decent(0.98, 0.98, 4, 1, L_0_in, 300))
+
+
+def test_main_writes_npz(tmp_path):
+    path = str(tmp_path / "fidelity.npz")
+    assert main(["TwoD_network_fidelity", "--set", "N=3", "--L_0_in", "1e-3", "500", "20", "--out", path]) == 0
+    with np.load(path) as data:
+        np.testing.assert_array_equal(data["L_0_in"], np.linspace(1e-3, 500, 20))
+        _, expected = evaluate("TwoD_network_fidelity", data["L_0_in"], N=3)
+        np.testing.assert_array_equal(data["value"], expected)
+        assert int(data["N"]) == 3 and float(data["q_BSM"]) == 0.98
+
+
+def test_main_lists_the_models(capsys):
+    assert main(["--list"]) == 0
+    assert "Rate_2D: N=3, m=1, t=Centralized" in capsys.readouterr().out
+
+
+def test_main_rejects_unknown_parameters(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["Rate_Factory", "--set", "k_max=10"])
+    assert exit_info.value.code == 2
+    assert "does not take the parameters ['k_max']" in capsys.readouterr().err
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from Unchecked.Distribution import CompletionTimeDistribution, completion_time_distribution
+from Unchecked.Rate_2D_func import Rate_2D
+from Unchecked.Rate_func import Rate_Decent, Rate_Factory
+
+DISTANCES = np.array([5.0, 40.0])
+
+
+def _renewal_pmf(round_cdf, success_prob, k_max):
+    """P(T = k), k = 0..k_max, by the plain loop over the renewal equation."""
+    pmf = np.diff(round_cdf, axis=0, prepend=0)
+    total = np.zeros((k_max + 1, round_cdf.shape[1]))
+    for k in range(1, k_max + 1):
+        j = np.arange(1, min(k, pmf.shape[0]) + 1)
+        direct = success_prob * pmf[k - 1] if k <= pmf.shape[0] else 0
+        total[k] = direct + (1 - success_prob) * np.sum(pmf[j - 1] * total[k - j], axis=0)
+    return total
+
+
+def test_centralized_mean_is_inverse_rate_factory():
+    dist = completion_time_distribution("Centralized", 0.9, 4, DISTANCES)
+    np.testing.assert_allclose(dist.mean(), 1 / Rate_Factory(0.9, 4, 1, DISTANCES), rtol=1e-10)
+
+
+def test_model_mean_matches_rate_decent_and_rate_2d():
+    decent = completion_time_distribution("Decentralized", 0.9, 3, DISTANCES, k_max=2000)
+    np.testing.assert_allclose(decent.model_mean(), 1 / Rate_Decent(0.9, 0.9, 3, 1, DISTANCES, 2000), rtol=1e-12)
+    twod = completion_time_distribution("2D", 0.95, 3, DISTANCES, m=2, t="Decentralized", k_max=2000)
+    np.testing.assert_allclose(twod.model_mean(), 1 / Rate_2D(0.95, 0.95, 3, 1, DISTANCES, 2, 2000, "Decentralized"),
+                               rtol=1e-12)
+
+
+@pytest.mark.parametrize("protocol", ["Centralized", "Decentralized", "2D"])
+def test_incremental_round_table_matches_one_pass(protocol):
+    distances = np.array([5.0, 120.0])
+    doubled = completion_time_distribution(protocol, 0.95, 3, distances, m=2)
+    one_pass = completion_time_distribution(protocol, 0.95, 3, distances, m=2, k_max=doubled.k_max)
+    assert doubled.k_max > 1024
+    np.testing.assert_allclose(doubled.round_cdf, one_pass.round_cdf, rtol=0, atol=1e-14)
+
+
+def test_cdf_and_quantiles_match_renewal_loop():
+    dist = completion_time_distribution("Decentralized", 0.8, 3, DISTANCES, k_max=300)
+    reference = np.cumsum(_renewal_pmf(dist.round_cdf, dist.success_prob, 600), axis=0)
+    for k in (0, 1, 10, 100, 599):
+        np.testing.assert_allclose(dist.cdf(k), reference[k], rtol=0, atol=1e-14)
+    for q in (0.01, 0.5, 0.99):
+        np.testing.assert_array_equal(dist.quantile(q), np.argmax(reference >= q, axis=0))
+
+
+def test_quantile_of_single_slot_rounds_is_geometric():
+    # Every round takes one slot, so T is geometric(p): P(T <= k) = 1 - (1 - p)^k
+    dist = CompletionTimeDistribution(np.ones((1, 1)), 0.3)
+    assert dist.quantile(0.5) == np.ceil(np.log(0.5) / np.log(0.7))
+    assert dist.sf(10) == pytest.approx(0.7**10, rel=1e-12)
+
+
+@pytest.mark.parametrize("q_BSM", [0.05, 0.2])
+def test_small_quantiles_of_high_variance_rounds(q_BSM):
+    # std > mean, so the shifted-exponential guess of a small quantile is below one slot
+    dist = completion_time_distribution("Decentralized", q_BSM, 2, np.array([50.0]), q_Fuse=1.0, k_max=4096)
+    reference = np.cumsum(_renewal_pmf(dist.round_cdf, dist.success_prob, 200), axis=0)
+    for q in (0.0005, 0.01):
+        assert dist.quantile(q) == np.argmax(reference[:, 0] >= q)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from Unchecked.Gradients import Rate_Decent_grad, Rate_Factory_grad, factory_fidelity_grad
+from Unchecked.Leading_F import _factory_fidelity, _g_subset_sums, factory_fidelity
+from Unchecked.Rate_func import Rate_Decent, Rate_Factory, _decent_link_cdf, _expected_max_geometric
+
+DISTANCES = np.array([0.5, 10.0, 60.0])
+
+
+def _central_difference(func, x, h):
+    return (func(x + h) - func(x - h)) / (2 * h)
+
+
+def test_decent_link_cdf_derivative_pass_keeps_the_value():
+    q_link = np.array([0.01, 0.2, 0.45])
+    table = _decent_link_cdf(0.9, q_link, 300, derivatives=True)
+    np.testing.assert_array_equal(table[:, 0], _decent_link_cdf(0.9, q_link, 300))
+    np.testing.assert_allclose(table[:, 1], _central_difference(lambda q: _decent_link_cdf(0.9, q, 300), q_link, 1e-6),
+                               rtol=1e-6, atol=1e-9)
+    np.testing.assert_allclose(table[:, 2], _central_difference(lambda p: _decent_link_cdf(p, q_link, 300), 0.9, 1e-6),
+                               rtol=1e-6, atol=1e-9)
+
+
+def test_derivative_passes_keep_the_values():
+    q_link = np.array([1e-4, 0.01, 0.3])
+    M, _ = _expected_max_geometric(6, q_link, derivatives=True)
+    np.testing.assert_array_equal(M, _expected_max_geometric(6, q_link))
+    gs = _g_subset_sums(6, q_link, 0.02, derivatives=True)
+    np.testing.assert_array_equal(gs[0], _g_subset_sums(6, q_link, 0.02))
+    with pytest.raises(ValueError):
+        _factory_fidelity(4, q_link, 0.01, 0, 0, 1, method="reference", derivatives=True)
+
+
+@pytest.mark.parametrize("N", [3, 5])
+def test_rate_decent_grad_matches_finite_differences(N):
+    result = Rate_Decent_grad(0.9, 0.95, N, 1, DISTANCES, 500)
+    np.testing.assert_allclose(result["rate"], Rate_Decent(0.9, 0.95, N, 1, DISTANCES, 500), rtol=1e-13)
+    expected = {
+        "d_L_0_in": _central_difference(lambda L: Rate_Decent(0.9, 0.95, N, 1, L, 500), DISTANCES, 1e-4),
+        "d_q_BSM": _central_difference(lambda p: Rate_Decent(p, 0.95, N, 1, DISTANCES, 500), 0.9, 1e-6),
+        "d_q_Fuse": _central_difference(lambda p: Rate_Decent(0.9, p, N, 1, DISTANCES, 500), 0.95, 1e-6),
+    }
+    for name, value in expected.items():
+        np.testing.assert_allclose(result[name], value, rtol=1e-6)
+
+
+def test_rate_factory_grad_matches_finite_differences():
+    result = Rate_Factory_grad(0.98, 4, 1, DISTANCES)
+    np.testing.assert_allclose(result["rate"], Rate_Factory(0.98, 4, 1, DISTANCES), rtol=1e-13)
+    np.testing.assert_allclose(result["d_L_0_in"],
+                               _central_difference(lambda L: Rate_Factory(0.98, 4, 1, L), DISTANCES, 1e-4), rtol=1e-6)
+    np.testing.assert_allclose(result["d_q_BSM"],
+                               _central_difference(lambda p: Rate_Factory(p, 4, 1, DISTANCES), 0.98, 1e-6), rtol=1e-6)
+
+
+def test_factory_fidelity_grad_matches_finite_differences():
+    result = factory_fidelity_grad(5, DISTANCES, 0.01, 0.01, 0.01, 0.95)
+    np.testing.assert_array_equal(result["fidelity"], factory_fidelity(5, DISTANCES, 0.01, 0.01, 0.01, 0.95))
+    np.testing.assert_allclose(result["d_L_0_in"],
+                               _central_difference(lambda L: factory_fidelity(5, L, 0.01, 0.01, 0.01, 0.95),
+                                                   DISTANCES, 1e-4), rtol=1e-6)
+    np.testing.assert_allclose(result["d_mem_depolar_prob"],
+                               _central_difference(lambda p: factory_fidelity(5, DISTANCES, p, 0.01, 0.01, 0.95),
+                                                   0.01, 1e-7), rtol=1e-6)
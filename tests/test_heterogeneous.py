@@ -0,0 +1,36 @@
+import numpy as np
+
+from Unchecked.Heterogeneous import Rate_Decent_hetero, Rate_Factory_hetero, link_success_prob
+from Unchecked.Links import DEFAULT_LINK_MODEL
+from Unchecked.Rate_func import Rate_Decent, Rate_Factory
+
+DISTANCES = np.array([1.0, 30.0, 100.0])
+
+
+def test_factory_hetero_matches_rate_factory_on_equal_links():
+    q_link = DEFAULT_LINK_MODEL.q_link("factory", DISTANCES, 4)
+    rate, err, k_stop = Rate_Factory_hetero(0.98, 1, np.repeat(q_link[:, None], 4, axis=1), rtol=1e-10)
+    expected = Rate_Factory(0.98, 4, 1, DISTANCES)
+    assert np.all(np.abs(rate - expected) <= err)
+    assert np.all(err <= 2e-10 * rate)
+    assert rate.shape == k_stop.shape == (3,)
+
+
+def test_decent_hetero_matches_rate_decent_on_equal_links():
+    q_link = DEFAULT_LINK_MODEL.q_link("decentralized", DISTANCES)
+    rate = Rate_Decent_hetero(0.9, 0.95, 1, np.repeat(q_link[:, None], 3, axis=1), 800)
+    np.testing.assert_allclose(rate, Rate_Decent(0.9, 0.95, 3, 1, DISTANCES, 800), rtol=1e-13)
+
+
+def test_factory_hetero_orders_by_slowest_link():
+    q_link = link_success_prob(np.array([[5.0, 5.0, 40.0], [5.0, 40.0, 40.0]]))
+    rate, _, _ = Rate_Factory_hetero(0.98, 1, q_link)
+    assert rate[0] > rate[1]
+
+
+def test_factory_hetero_reports_truncation_at_k_limit():
+    q_link = np.full(4, DEFAULT_LINK_MODEL.q_link("factory", 500.0, 4))
+    rate, err, k_stop = Rate_Factory_hetero(0.98, 1, q_link, k_limit=2 ** 16)
+    assert k_stop == 2 ** 16
+    assert rate > 10 * Rate_Factory(0.98, 4, 1, 500.0)
+    assert err > rate
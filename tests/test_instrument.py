@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from Unchecked import Leading_F, Rate_func, TwoD_Leading_F
+from Unchecked.Cache import CurveCache
+from Unchecked.Instrument import profile
+from Unchecked.Leading_F import factory_fidelity
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DISTANCES = np.array([1.0, 20.0, 80.0])
+
+
+def test_functions_are_unwrapped_while_disabled():
+    original = Leading_F._g_function
+    assert not hasattr(original, "__wrapped__")
+    with profile():
+        assert Leading_F._g_function.__wrapped__ is original
+    assert Leading_F._g_function is original and factory_fidelity is Leading_F.factory_fidelity
+
+
+def test_calls_and_counters_are_recorded():
+    with profile() as session:
+        # Called through the name imported at the top of this module
+        factory_fidelity(5, DISTANCES, 1e-2, 0, 0, 1, method="reference")
+        factory_fidelity(5, DISTANCES, 1e-2, 0, 0, 1)
+        Rate_func.Rate_Decent(0.98, 0.98, 3, 1, DISTANCES, 100, method="reference")
+    stats = session.stats
+    assert stats["Leading_F.factory_fidelity"]["calls"] == 2
+    assert stats["Leading_F._g_function"]["calls"] == 2 ** 4 + 1  # subsets of an even size, and U
+    assert stats["Leading_F._g_subset_sums"]["dp_steps"] == 5
+    assert stats["Rate_func._rate_decent_reference"]["inner_iterations"] == 3 * 100 * 101 // 2
+    record = stats["Leading_F.factory_fidelity"]
+    assert 0 <= record["self_seconds"] <= record["seconds"]
+
+
+def test_json_trace(tmp_path):
+    with profile(trace=True) as session:
+        Rate_func.Rate_Factory(0.98, 3, 1, DISTANCES)
+    session.write_json(str(tmp_path / "trace-{pid}.json"))
+    with open(tmp_path / f"trace-{os.getpid()}.json") as json_file:
+        trace = json.load(json_file)
+    assert trace["functions"]["Rate_func.Rate_Factory"]["calls"] == 1
+    names = [event["name"] for event in trace["traceEvents"]]
+    assert "Rate_func.Rate_Factory" in names and "Rate_func._expected_max_geometric" in names
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in trace["traceEvents"])
+
+
+def test_cache_hit_rates():
+    rate_factory = CurveCache().cached(Rate_func.Rate_Factory)
+    TwoD_Leading_F._level_prefactors.cache_clear()
+    with profile() as session:
+        for _ in range(3):
+            rate_factory(0.98, 3, 1, DISTANCES)
+            TwoD_Leading_F.TwoD_network_fidelity(4, 0.1, 1e-2, 0, 0.9)
+    curves = session.stats["Rate_func.Rate_Factory"]
+    assert curves["calls"] == 1
+    assert (curves["curve_cache_hits"], curves["curve_cache_misses"]) == (2, 1)
+    levels = session.stats["TwoD_Leading_F._G_levels"]
+    assert (levels["lru_cache_hits"], levels["lru_cache_misses"]) == (2, 1)
+    assert "curve_cache_hit_rate=66.7%" in session.summary()
+    assert "lru_cache_hit_rate=66.7%" in session.summary()
+
+
+def test_profile_from_the_environment(tmp_path):
+    path = tmp_path / "profile.json"
+    code = "import numpy as np; from Unchecked import Rate_Factory; Rate_Factory(0.98, 3, 1, np.ones(3))"
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT, env={**os.environ, "CVD_PROFILE": str(path)})
+    with open(path) as json_file:
+        trace = json.load(json_file)
+    assert trace["functions"]["Rate_func.Rate_Factory"]["calls"] == 1
+    assert trace["traceEvents"]
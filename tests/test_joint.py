@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from Unchecked.Joint import rate_and_fidelity, twod_fidelity
+from Unchecked.Leading_F import factory_fidelity
+from Unchecked.Plot_F import fidelity_curves
+from Unchecked.Rate_2D_func import Rate_2D
+from Unchecked.Rate_func import Rate_Decent, Rate_Factory
+from Unchecked.TwoD_Leading_F import TwoD_network_fidelity
+
+DISTANCES = np.array([1.0, 20.0, 80.0])
+NOISE = dict(mem_depolar_prob=1e-2, link_depolar_prob=1e-3, bsm_depolar_prob=1e-3, ghz_fidelity=0.99)
+
+
+@pytest.mark.parametrize("N", [3, 4])
+def test_centralized_matches_separate_calls(N):
+    result = rate_and_fidelity("Centralized", N, DISTANCES, q_BSM=0.9, delta_t=2, **NOISE)
+    np.testing.assert_allclose(result["rate"], Rate_Factory(0.9, N, 2, DISTANCES), rtol=1e-14)
+    np.testing.assert_allclose(result["fidelity"], factory_fidelity(N, DISTANCES, *NOISE.values()), rtol=1e-14)
+
+
+def test_decentralized_matches_separate_call():
+    result = rate_and_fidelity("Decentralized", 3, DISTANCES, q_BSM=0.9, q_Fuse=0.8, k_max=500)
+    np.testing.assert_allclose(result["rate"], Rate_Decent(0.9, 0.8, 3, 1, DISTANCES, 500), rtol=1e-14)
+    assert np.all(np.isnan(result["fidelity"]))
+
+
+def test_2d_matches_separate_calls():
+    N = 3
+    result = rate_and_fidelity("2D", N, DISTANCES, q_BSM=0.9, k_max=500, **NOISE)
+    np.testing.assert_allclose(result["rate"], Rate_2D(0.9, 0.9, N, 1, DISTANCES, 1, 500, "Centralized"),
+                               rtol=1e-14)
+    # The fidelity of Plot_F.py: GHZ-factory parents at L_0_in / 2
+    F_target = factory_fidelity(N, DISTANCES / 2, *NOISE.values())
+    parents = Rate_Factory(0.9, N, 1, DISTANCES / 2)
+    expected = TwoD_network_fidelity(N, parents, NOISE["mem_depolar_prob"], NOISE["bsm_depolar_prob"], F_target)
+    np.testing.assert_allclose(result["fidelity"], expected, rtol=1e-14)
+
+
+def test_scalar_distance_gives_scalars():
+    result = rate_and_fidelity("Centralized", 3, 10.0)
+    assert isinstance(result["rate"], float) and isinstance(result["fidelity"], float)
+
+
+def test_fidelity_curves_match_separate_calls():
+    N = 4
+    F_target, F_TwoDim = fidelity_curves(N, DISTANCES, 1e-2, 1e-3, 1e-3, 0.95, 0.99)
+    expected_target = factory_fidelity(N, DISTANCES / 2, 1e-2, 1e-3, 1e-3, 0.99)
+    parents = Rate_Factory(q_BSM=0.95, N=N, delta_t=1, L_0_in=DISTANCES / 2)
+    np.testing.assert_array_equal(F_target, expected_target)
+    np.testing.assert_array_equal(F_TwoDim, TwoD_network_fidelity(N, parents, 1e-2, 1e-3, expected_target))
+
+
+def test_twod_fidelity_is_the_2d_fidelity():
+    expected = rate_and_fidelity("2D", 4, DISTANCES, q_BSM=0.95, k_max=100, **NOISE)["fidelity"]
+    np.testing.assert_allclose(twod_fidelity(4, DISTANCES, 0.95, *NOISE.values()), expected, rtol=1e-14)
+    np.testing.assert_array_equal(twod_fidelity(4, DISTANCES, 0.95, *NOISE.values()),
+                                  fidelity_curves(4, DISTANCES, 1e-2, 1e-3, 1e-3, 0.95, 0.99)[1])
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from Unchecked.Leading_F import _g_function, _g_subset_sums, factory_fidelity
+
+DISTANCES = np.array([1e-3, 5.0, 40.0, 150.0, 300.0])
+
+
+@pytest.mark.parametrize("N", [2, 3, 4, 7])
+@pytest.mark.parametrize("noise", [(1e-2, 0, 0, 1), (1e-2, 0.01, 0.02, 0.95), (0.2, 0.1, 0.05, 0.9)])
+def test_factory_fidelity_fast_matches_reference(N, noise):
+    fast = factory_fidelity(N, DISTANCES, *noise)
+    reference = factory_fidelity(N, DISTANCES, *noise, method="reference")
+    np.testing.assert_allclose(fast, reference, rtol=1e-12)
+
+
+def test_factory_fidelity_scalar_distance():
+    fast = factory_fidelity(3, 20.0, 1e-2, 0, 0, 1)
+    assert np.ndim(fast) == 0
+    assert fast == pytest.approx(factory_fidelity(3, 20.0, 1e-2, 0, 0, 1, method="reference"), rel=1e-12)
+
+
+def test_g_subset_sums_match_subset_enumeration():
+    N, q, prob = 5, 0.3, 0.02
+    gs = _g_subset_sums(N, q, prob)
+    for size in range(N + 1):
+        subsets = [set(int(j) for j in np.flatnonzero(mask) + 1)
+                   for mask in np.ndindex(*(2,) * N) if sum(mask) == size]
+        assert gs[size] == pytest.approx(sum(_g_function(N, q, subset, prob) for subset in subsets), rel=1e-12)
+
+
+def test_factory_fidelity_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        factory_fidelity(3, DISTANCES, 1e-2, 0, 0, 1, method="slow")
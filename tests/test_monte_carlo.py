@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from Unchecked.Monte_Carlo import iter_estimates, make_sampler, simulate_ET
+
+
+@pytest.mark.parametrize("L_0_in", [5.0, 40.0])
+def test_centralized_matches_rate_factory(L_0_in):
+    result = simulate_ET("Centralized", 0.9, 3, L_0_in, n_samples=2 * 10**5, seed=1, confidence=0.999)
+    assert abs(result["abs_diff"]) <= result["ci"]
+
+
+def test_decentralized_matches_rate_decent_adaptive_up_to_the_k0_term():
+    # With reliable BSMs the model is exact but for the k = 0 term, one time step per round
+    result = simulate_ET("Decentralized", 1.0, 3, 20.0, q_Fuse=0.9, n_samples=2 * 10**5, seed=1, confidence=0.999)
+    assert abs(result["abs_diff"] - 1 / 0.9**3) <= result["ci"]
+
+
+def test_same_seed_reproduces_the_estimate():
+    estimates = []
+    first = simulate_ET("2D", 0.95, 3, 20.0, n_samples=10**4, batch_size=2500, seed=7, callback=estimates.append)
+    assert simulate_ET("2D", 0.95, 3, 20.0, n_samples=10**4, batch_size=2500, seed=7) == first
+    assert simulate_ET("2D", 0.95, 3, 20.0, n_samples=10**4, batch_size=2500, seed=8)["mean"] != first["mean"]
+    assert [estimate["n"] for estimate in estimates] == [2500, 5000, 7500, 10000]
+
+
+def test_streamed_estimate_matches_all_samples():
+    samples = make_sampler("Decentralized", 0.9, 4, 10.0, rng=np.random.default_rng(3))(10**4).astype(float)
+    batches = iter(np.split(samples, [4000, 8000]))
+    estimate = list(iter_estimates(lambda size: next(batches), 10**4, batch_size=4000))[-1]
+    assert estimate["mean"] == pytest.approx(samples.mean(), rel=1e-12)
+    assert estimate["std"] == pytest.approx(samples.std(ddof=1), rel=1e-12)
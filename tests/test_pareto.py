@@ -0,0 +1,57 @@
+import numpy as np
+
+from Unchecked import Pareto
+from Unchecked.Joint import rate_and_fidelity
+from Unchecked.Pareto import _nondominated, design_space, pareto_frontier
+
+FIDELITY_DESIGNS = design_space(N_values=(3, 4, 5), designs=("Centralized", "2D"), m_values=(1,),
+                                t_values=("Centralized",))
+
+
+def test_skipped_candidates_are_flagged_and_not_counted():
+    candidates = design_space(N_values=(3, 4))
+    result = pareto_frontier(candidates, coarse=5, levels=2)
+    kept = len(candidates) - len(result["skipped"])
+    assert not result["complete"]
+    assert all(c["design"] == "Decentralized" or (c["design"] == "2D" and (c["m"], c["t"]) != (1, "Centralized"))
+               for c in result["skipped"])
+    assert result["full_grid_evaluations"] == kept * ((5 - 1) * 2**2 + 1)
+    assert kept * 5 <= result["evaluations"] <= result["full_grid_evaluations"]
+
+
+def test_skipped_candidates_are_not_evaluated(monkeypatch):
+    evaluated = []
+
+    def rate_and_fidelity_spy(**kwargs):
+        evaluated.append((kwargs["design"], kwargs.get("m", 1), kwargs.get("t", "Centralized")))
+        return rate_and_fidelity(**kwargs)
+
+    monkeypatch.setattr(Pareto, "rate_and_fidelity", rate_and_fidelity_spy)
+    pareto_frontier(design_space(N_values=(3,)), coarse=5, levels=2)
+    assert set(evaluated) == {("Centralized", 1, "Centralized"), ("2D", 1, "Centralized")}
+
+
+def _brute_force_members(candidates, L_0_in):
+    evaluated = [rate_and_fidelity(L_0_in=L_0_in, **candidate) for candidate in candidates]
+    rate = np.array([value["rate"] for value in evaluated])
+    fidelity = np.array([value["fidelity"] for value in evaluated])
+    return {str(candidates[i]) for i in _nondominated(rate, fidelity)}
+
+
+def test_frontier_matches_brute_force_grid():
+    coarse, levels = 5, 3
+    result = pareto_frontier(FIDELITY_DESIGNS, coarse=coarse, levels=levels)
+    assert result["complete"]
+    assert result["evaluations"] < result["full_grid_evaluations"]
+    evaluated = {np.log(point["L_0_in"]): {str({key: value for key, value in member.items()
+                                                if key not in ("rate", "fidelity")})
+                                           for member in point["members"]}
+                 for point in result["frontier"]}
+    s_evaluated = np.array(sorted(evaluated))
+    # Every point of the full grid lies between two evaluated points with the same frontier,
+    # or is evaluated itself; the brute-force frontier there must be that frontier
+    for s in np.linspace(0, np.log(300), (coarse - 1) * 2**levels + 1):
+        left = s_evaluated[np.searchsorted(s_evaluated, s + 1e-9) - 1]
+        right = s_evaluated[min(np.searchsorted(s_evaluated, s - 1e-9), len(s_evaluated) - 1)]
+        assert evaluated[left] == evaluated[right]
+        assert _brute_force_members(FIDELITY_DESIGNS, np.exp(s)) == evaluated[left]
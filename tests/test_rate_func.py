@@ -0,0 +1,56 @@
+import math
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from Unchecked.Links import DEFAULT_LINK_MODEL
+from Unchecked.Rate_func import Rate_Decent, Rate_Factory, _expected_max_geometric
+
+DISTANCES = np.array([1e-3, 5.0, 40.0, 150.0, 300.0])
+
+
+@pytest.mark.parametrize("N", [2, 3, 5])
+@pytest.mark.parametrize("q_BSM, q_Fuse", [(1.0, 1.0), (0.98, 0.9), (0.6, 0.75)])
+def test_rate_decent_fast_matches_reference(N, q_BSM, q_Fuse):
+    fast = Rate_Decent(q_BSM, q_Fuse, N, 1, DISTANCES, 200)
+    reference = Rate_Decent(q_BSM, q_Fuse, N, 1, DISTANCES, 200, method="reference")
+    np.testing.assert_allclose(fast, reference, rtol=1e-11)
+
+
+def test_rate_decent_fast_matches_reference_on_2d_sweep():
+    L_0_in = DISTANCES[:4].reshape(2, 2)
+    fast = Rate_Decent(0.9, 0.9, 3, 1, L_0_in, 150)
+    reference = Rate_Decent(0.9, 0.9, 3, 1, L_0_in, 150, method="reference")
+    assert fast.shape == (2, 2)
+    np.testing.assert_allclose(fast, reference, rtol=1e-11)
+
+
+def test_rate_decent_scalar_distance():
+    fast = Rate_Decent(0.98, 0.98, 4, 1, 20.0, 300)
+    assert isinstance(fast, float)
+    assert fast == pytest.approx(Rate_Decent(0.98, 0.98, 4, 1, 20.0, 300, method="reference"), rel=1e-11)
+
+
+def test_rate_decent_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        Rate_Decent(0.98, 0.98, 3, 1, DISTANCES, 10, method="slow")
+
+
+def _exact_expected_max(N, q):
+    """E[max of N geometrics] from the alternating sum in exact rational arithmetic."""
+    q = Fraction(q)
+    return float(sum(Fraction((-1) ** (j + 1) * math.comb(N, j)) / (1 - (1 - q) ** j) for j in range(1, N + 1)))
+
+
+@pytest.mark.parametrize("N", [1, 3, 20, 60])
+@pytest.mark.parametrize("q", [1e-6, 0.01, 0.5, 1.0])
+def test_expected_max_matches_exact_arithmetic(N, q):
+    assert _expected_max_geometric(N, np.array([q]))[0] == pytest.approx(_exact_expected_max(N, q), rel=1e-11)
+
+
+@pytest.mark.parametrize("N", [3, 4, 8])
+def test_rate_factory_matches_exact_arithmetic(N):
+    q_link = DEFAULT_LINK_MODEL.q_link("factory", DISTANCES, N)
+    expected = [0.98**N / (2 * _exact_expected_max(N, q)) for q in q_link]
+    np.testing.assert_allclose(Rate_Factory(0.98, N, 2, DISTANCES), expected, rtol=1e-11)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from Unchecked.Leading_F import factory_fidelity
+from Unchecked.Rate_func import Rate_Factory
+from Unchecked.Sampling import adaptive_sample
+
+DENSE = 100001
+
+
+class Counted:
+    """A vectorized function that counts the points it is evaluated at."""
+
+    def __init__(self, func):
+        self.func = func
+        self.points = 0
+
+    def __call__(self, x):
+        self.points += np.size(x)
+        return self.func(x)
+
+
+def _max_interpolation_error(x, y, func, lo, hi):
+    """Largest error of linear interpolation between the samples on a dense grid, relative to the curve height."""
+    dense = np.linspace(lo, hi, DENSE)
+    exact = np.atleast_2d(func(dense))
+    interpolated = np.array([np.interp(dense, x, curve) for curve in y])
+    height = np.ptp(exact, axis=1, keepdims=True)
+    return np.max(np.abs(interpolated - exact) / height)
+
+
+@pytest.mark.parametrize("tol", [1e-2, 1e-3, 1e-4])
+def test_fidelity_curve_meets_tolerance_with_few_evaluations(tol):
+    model = lambda L: factory_fidelity(3, L, 1e-2, 0, 0, 1)
+    func = Counted(model)
+    x, y = adaptive_sample(func, 1e-3, 500, tol)
+    assert np.all(np.diff(x) > 0) and (x[0], x[-1]) == (1e-3, 500)
+    assert _max_interpolation_error(x, y, model, 1e-3, 500) <= 2 * tol
+    assert func.points < DENSE / 50
+
+
+def test_several_curves_on_log_scale():
+    model = lambda L: np.stack([Rate_Factory(0.98, 3, 1, L), Rate_Factory(0.98, 4, 1, L)])
+    func = Counted(model)
+    x, y = adaptive_sample(func, 1e-3, 500, 1e-3, scale="log")
+    assert y.shape == (2, x.size)
+    assert _max_interpolation_error(x, y, model, 1e-3, 500) <= 2e-3
+    assert func.points < DENSE / 50
+
+
+def test_sharp_feature_is_resolved():
+    model = lambda x: np.tanh((x - 0.3) / 1e-3)
+    x, y = adaptive_sample(model, 0, 1, 1e-3)
+    assert _max_interpolation_error(x, y, model, 0, 1) <= 2e-3
+    assert x.size < 1000
+
+
+def test_max_points_stops_subdividing():
+    x, _ = adaptive_sample(np.sin, 0, 1000, 1e-6, max_points=500)
+    assert 500 <= x.size < 1000
+
+
+def test_unknown_scale():
+    with pytest.raises(ValueError):
+        adaptive_sample(np.sin, 0, 1, scale="cubic")
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from Unchecked.Joint import twod_fidelity
+from Unchecked.Leading_F import factory_fidelity
+from Unchecked.Rate_func import Rate_Decent_adaptive, Rate_Factory
+from Unchecked.Solvers import crossover_distance, fidelity_distance
+
+NOISE = (1e-2, 0, 0, 1)  # mem_depolar_prob, link_depolar_prob, bsm_depolar_prob, ghz_fidelity
+
+
+def _last_crossing(L, values, target):
+    """Dense-grid bracket [L[i], L[i + 1]] of the last distance where values falls below target."""
+    index = np.flatnonzero(values >= target)[-1]
+    return L[index], L[index + 1]
+
+
+@pytest.mark.parametrize("method", ["brent", "bisect", "newton"])
+def test_crossover_distance_matches_dense_grid(method):
+    L_cross = crossover_distance(0.98, 0.98, 4, L_max=50, method=method)
+    L = np.linspace(1, 50, 4901)
+    log_ratio = np.log(Rate_Decent_adaptive(0.98, 0.98, 4, 1, L, rtol=1e-9)[0] / Rate_Factory(0.98, 4, 1, L))
+    index = np.flatnonzero(np.signbit(log_ratio[:-1]) != np.signbit(log_ratio[1:]))[0]
+    assert L[index] <= L_cross <= L[index + 1]
+    ratio = Rate_Decent_adaptive(0.98, 0.98, 4, 1, L_cross, rtol=1e-9)[0] / Rate_Factory(0.98, 4, 1, L_cross)
+    assert abs(np.log(ratio)) < 1e-6
+
+
+@pytest.mark.parametrize("method", ["brent", "bisect", "newton"])
+def test_factory_fidelity_distance_matches_dense_grid(method):
+    L_threshold = fidelity_distance(0.8, 3, network="factory", method=method)
+    L = np.linspace(1e-3, 500, 50001)
+    lo, hi = _last_crossing(L, factory_fidelity(3, L, *NOISE), 0.8)
+    assert lo <= L_threshold <= hi
+    assert abs(factory_fidelity(3, L_threshold, *NOISE) - 0.8) < 1e-8
+
+
+@pytest.mark.parametrize("method", ["brent", "bisect"])
+def test_2d_fidelity_distance_matches_dense_grid(method):
+    L_threshold = fidelity_distance(0.2, 3, network="2D", method=method)
+    L = np.linspace(1e-3, 500, 50001)
+    lo, hi = _last_crossing(L, twod_fidelity(3, L), 0.2)
+    assert lo <= L_threshold <= hi
+    assert abs(twod_fidelity(3, L_threshold) - 0.2) < 1e-8
+
+
+def test_fidelity_distance_out_of_reach():
+    assert np.isnan(fidelity_distance(0.99, 3, network="2D"))
+    assert fidelity_distance(0.1, 3, network="2D") == 500
@@ -0,0 +1,34 @@
+import os
+
+import numpy as np
+import pytest
+
+from Unchecked.Sweep import load_chunks, run_sweep
+
+GRID = {"model": ["Rate_Factory", "factory_fidelity"], "N": [3, 4], "L_0_in": np.array([1.0, 50.0])}
+
+
+def test_run_sweep_writes_no_stray_files(tmp_path):
+    results = run_sweep(GRID, str(tmp_path), max_workers=0, chunk_size=1)
+    assert len(results["value"]) == 4 * 2
+    assert sorted(os.listdir(tmp_path)) == ["chunk_00000.npz", "chunk_00001.npz", "chunk_00002.npz",
+                                            "chunk_00003.npz", "manifest.json", "results.npz"]
+
+
+@pytest.mark.parametrize("leftover", ["chunk_00003.npz.tmp", "chunk_00003.npz.tmp.npz"])
+def test_load_chunks_skips_partial_temporary_files(tmp_path, leftover):
+    run_sweep(GRID, str(tmp_path), max_workers=0, chunk_size=1)
+    os.remove(tmp_path / "chunk_00003.npz")
+    # What a sweep killed while writing chunk 3 leaves behind
+    (tmp_path / leftover).write_bytes(b"PK\x03\x04 truncated")
+    assert len(load_chunks(str(tmp_path))["value"]) == 3 * 2
+
+
+def test_resumed_sweep_matches_uninterrupted_sweep(tmp_path):
+    full = run_sweep(GRID, str(tmp_path / "full"), max_workers=0, chunk_size=1)
+    run_sweep(GRID, str(tmp_path / "resumed"), max_workers=0, chunk_size=1)
+    os.remove(tmp_path / "resumed" / "chunk_00002.npz")
+    (tmp_path / "resumed" / "chunk_00002.npz.tmp").write_bytes(b"PK\x03\x04 truncated")
+    resumed = run_sweep(GRID, str(tmp_path / "resumed"), max_workers=0, chunk_size=1)
+    for name in full:
+        np.testing.assert_array_equal(resumed[name], full[name])
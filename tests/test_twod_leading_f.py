@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from Unchecked.TwoD_Leading_F import G_function, TwoD_network_fidelity, _G_levels, _level_prefactors
+
+GHZ_SUCCESS_PROB = np.array([1e-3, 0.05, 0.4])
+
+
+@pytest.mark.parametrize("N", [2, 3, 4, 6])
+@pytest.mark.parametrize("mem_depolar_prob, bsm_depolar_prob, ghz_fidelity", [(1e-2, 0, 1), (0.02, 0.01, 0.9)])
+def test_fast_matches_reference(N, mem_depolar_prob, bsm_depolar_prob, ghz_fidelity):
+    fast = TwoD_network_fidelity(N, GHZ_SUCCESS_PROB, mem_depolar_prob, bsm_depolar_prob, ghz_fidelity)
+    reference = [TwoD_network_fidelity(N, q, mem_depolar_prob, bsm_depolar_prob, ghz_fidelity, method="reference")
+                 for q in GHZ_SUCCESS_PROB]
+    np.testing.assert_allclose(fast, reference, rtol=1e-12)
+
+
+@pytest.mark.parametrize("N", [1, 3, 5])
+def test_levels_match_g_function_enumeration(N):
+    levels = _G_levels(N, GHZ_SUCCESS_PROB, 0.03, 0.97)
+    for n in range(1, N + 1):
+        expected = [G_function(n, set(range(1, n + 1)), q, 0.03, 0.97) for q in GHZ_SUCCESS_PROB]
+        np.testing.assert_allclose(levels[n], expected, rtol=1e-12)
+
+
+def test_array_valued_ghz_fidelity_and_bsm_noise():
+    ghz_fidelity = np.array([0.8, 0.9, 1.0])
+    bsm_depolar_prob = np.array([0.0, 0.01, 0.02])
+    fast = TwoD_network_fidelity(4, GHZ_SUCCESS_PROB, 1e-2, bsm_depolar_prob, ghz_fidelity)
+    for j in range(3):
+        assert fast[j] == pytest.approx(TwoD_network_fidelity(4, GHZ_SUCCESS_PROB[j], 1e-2, bsm_depolar_prob[j],
+                                                              ghz_fidelity[j], method="reference"), rel=1e-12)
+
+
+def test_memo_holds_no_sweep_arrays():
+    _level_prefactors.cache_clear()
+    TwoD_network_fidelity(5, np.linspace(1e-4, 0.5, 10**5), 1e-2, 0, 0.95)
+    TwoD_network_fidelity(5, np.linspace(1e-4, 0.4, 10**5), 1e-2, 0, 0.95)
+    info = _level_prefactors.cache_info()
+    assert (info.hits, info.currsize) == (1, 1)
+    assert _level_prefactors(5).nbytes == 6 * 6 * 8